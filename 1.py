@@ -1,11 +1,15 @@
 import sys
 import os
 import subprocess
-import importlib
+import importlib.util
+import shutil
 import time
+import json
+import sqlite3
+import hashlib
+import asyncio
 import threading
-import multiprocessing
-import queue
+import collections
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 
@@ -17,80 +21,121 @@ def check_and_install_packages():
     Installs required libraries to your D:\ drive environment automatically.
     """
     required = [
-        ("google-generativeai", "google.generativeai"),
-        ("pandas", "pandas"), 
-        ("openpyxl", "openpyxl") # Required for Excel
+        ("httpx", "httpx"),
+        ("h2", "h2"),             # HTTP/2 support for httpx
+        ("aiolimiter", "aiolimiter"),
+        ("xlsxwriter", "xlsxwriter"), # Required for Excel
+        ("openpyxl", "openpyxl")      # Fallback Excel writer
     ]
 
     # Skip if running as compiled .exe
     if getattr(sys, 'frozen', False): 
         return
 
-    for package, import_name in required:
-        try:
-            importlib.import_module(import_name)
-        except ImportError:
-            print(f"[*] Installing missing library: {package}...")
-            try:
-                subprocess.check_call([
-                    sys.executable, "-m", "pip", "install", 
-                    "--user", package, 
-                    "--quiet", "--disable-pip-version-check"
-                ])
-                print(f"[+] {package} installed.")
-            except Exception as e:
-                print(f"[!] Install Failed: {e}")
+    # find_spec only checks the package exists, without running its import code
+    missing = [package for package, import_name in required if importlib.util.find_spec(import_name) is None]
+    if not missing:
+        return
+
+    # One pip call for everything, so pip starts up only once
+    print(f"[*] Installing missing libraries: {', '.join(missing)}...")
+    try:
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install", 
+            "--user", *missing, 
+            "--quiet", "--disable-pip-version-check"
+        ])
+        print(f"[+] {', '.join(missing)} installed.")
+    except Exception as e:
+        print(f"[!] Install Failed: {e}")
 
 # Run installer check
 check_and_install_packages()
 
 # Safe Imports
-import pandas as pd
-import google.generativeai as genai
+try:
+    import xlsxwriter
+    _use_xlsx = True
+except ImportError:
+    # openpyxl in write-only mode also streams rows instead of building the whole sheet
+    import openpyxl
+    _use_xlsx = False
+import httpx
+from aiolimiter import AsyncLimiter
+
+# Gemini REST endpoint (called directly, no SDK needed)
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+
+# Max concurrent requests in flight
+MAX_IN_FLIGHT = 20
+
+# Published requests-per-minute for the model (free tier is 15, raise for paid keys)
+REQUESTS_PER_MINUTE = 15
+
+# Log window scrollback limit
+MAX_LOG_LINES = 5000
+
+# Max log lines waiting for the GUI (oldest are dropped beyond this)
+MAX_QUEUED_LOGS = 50000
+
+# Excel column order
+EXCEL_HEADERS = ["status", "topic", "output", "duration"]
+
+# One result row, fields already in Excel column order
+Result = collections.namedtuple("Result", EXCEL_HEADERS)
+
+# Response cache (skips re-sending prompts we already have answers for)
+CACHE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache.db")
+
+def open_cache(path=CACHE_DB):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE IF NOT EXISTS kv(key TEXT PRIMARY KEY, json BLOB, ts INTEGER)")
+    return db
+
+def cache_key(instruction, topic):
+    return hashlib.sha256(f"{instruction}|{topic}".encode("utf-8")).hexdigest()
 
 # ==============================================================================
-# 2. WORKER PROCESS (The Probe)
+# 2. ASYNC WORKER (The Probe)
 # ==============================================================================
-def mariner_probe(task_data):
+async def mariner_probe(client, sem, limiter, cache, instruction, topic):
     """
-    Runs on a separate CPU core to prevent GUI freezing.
+    Sends one topic to Gemini. Runs as a coroutine so many requests
+    can be in flight at once without blocking the GUI.
+    Answers already in the cache are returned without calling the API.
     """
-    topic = task_data['topic']
-    api_key = task_data['api_key']
-    instruction = task_data['instruction']
+    key = cache_key(instruction, topic)
+    row = cache.execute("SELECT json FROM kv WHERE key=?", (key,)).fetchone()
+    if row:
+        return Result(*json.loads(row[0]))._replace(status="CACHED")
     
     start_time = time.time()
     
     try:
-        genai.configure(api_key=api_key)
-        # Use 'gemini-1.5-flash' for speed, or 'gemini-pro' for detail
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
         prompt = f"INSTRUCTION: {instruction}\n\nTOPIC: {topic}"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
         
         # Generate
-        response = model.generate_content(prompt)
+        async with sem, limiter:
+            resp = await client.post(GEMINI_URL, json=payload)
+        resp.raise_for_status()
         
-        if not response.parts:
-             return {"status": "BLOCKED", "topic": topic, "output": "Safety Filter Triggered", "duration": 0}
+        # Same shape the SDK reads: candidates[0].content.parts
+        candidates = resp.json().get("candidates") or []
+        parts = candidates[0].get("content", {}).get("parts") if candidates else None
+        
+        if not parts:
+             return Result("BLOCKED", topic, "Safety Filter Triggered", 0)
 
-        text_out = response.text.strip()
+        text_out = "".join(p.get("text", "") for p in parts).strip()
         duration = round(time.time() - start_time, 2)
         
-        return {
-            "status": "SUCCESS",
-            "topic": topic,
-            "output": text_out,
-            "duration": duration
-        }
+        result = Result("SUCCESS", topic, text_out, duration)
+        cache.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, json.dumps(result), int(time.time())))
+        return result
 
     except Exception as e:
-        return {
-            "status": "ERROR",
-            "topic": topic,
-            "output": str(e),
-            "duration": 0
-        }
+        return Result("ERROR", topic, str(e), 0)
 
 # ==============================================================================
 # 3. GUI (Windows Interface)
@@ -101,12 +146,23 @@ class MarinerDesktopGUI:
         self.root.title("Project Mariner | Windows Desktop Edition")
         self.root.geometry("900x700")
         
-        self.msg_queue = queue.Queue()
-        self.results_cache = [] 
+        # Log lines go into a bounded ring (oldest dropped if the GUI falls behind).
+        # Results, progress and "done" are kept separately so they are never dropped.
+        self.msg_lock = threading.Lock()
+        self.msg_queue = collections.deque(maxlen=MAX_QUEUED_LOGS)
+        self.pending_results = []
+        self.latest_progress = None
+        self.batch_done = False
         self.topic_list = []
         
+        # Results are streamed into this workbook as they arrive
+        self.xlsx_path = None
+        self._wb = None
+        self._ws = None
+        self._row = 0
+        
         self.setup_ui()
-        self.root.after(100, self.process_queue)
+        self.setup_wakeup()
 
     def setup_ui(self):
         # Header
@@ -152,6 +208,7 @@ class MarinerDesktopGUI:
         self.txt_log.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         self.txt_log.tag_config("SUCCESS", foreground="green")
         self.txt_log.tag_config("ERROR", foreground="red")
+        self.txt_log.tag_config("CACHED", foreground="blue")
 
     def load_file(self):
         path = filedialog.askopenfilename(filetypes=[("Text Files", "*.txt")])
@@ -170,7 +227,10 @@ class MarinerDesktopGUI:
             messagebox.showerror("Error", "Please enter API Key")
             return
             
-        self.results_cache = [] # Clear old data
+        # Open the output workbook now and write rows as results arrive
+        self.xlsx_path = os.path.abspath(f"mariner_results_{time.strftime('%Y%m%d_%H%M%S')}.xlsx")
+        self.open_workbook(self.xlsx_path)
+        
         self.btn_run.config(state="disabled")
         self.btn_save.config(state="disabled")
         self.log("--- STARTING MISSION ---")
@@ -179,75 +239,161 @@ class MarinerDesktopGUI:
         threading.Thread(target=self.run_process, args=(key, prompt, self.topic_list), daemon=True).start()
 
     def run_process(self, key, prompt, topics):
-        # Prepare Tasks
-        tasks = [{'topic': t, 'api_key': key, 'instruction': prompt} for t in topics]
-        total = len(tasks)
-        
-        # Windows Multiprocessing Context
-        ctx = multiprocessing.get_context('spawn')
+        # Already on a background thread, so the event loop won't block the GUI
+        try:
+            cache = open_cache()
+            try:
+                asyncio.run(self._gather_all(key, prompt, topics, cache))
+            finally:
+                cache.commit()
+                cache.close()
+        except Exception as e:
+            self.queue_put("log", f"System: Batch failed: {e}", "ERROR")
+        finally:
+            # Always sent: closes the workbook and re-enables the buttons
+            self.queue_put("done")
+
+    async def _gather_all(self, key, prompt, topics, cache):
+        total = len(topics)
+        sem = asyncio.Semaphore(MAX_IN_FLIGHT)
+        # Token bucket: spaces requests out instead of bursting into 429s
+        limiter = AsyncLimiter(REQUESTS_PER_MINUTE, 60)
         
-        # Use max 3 cores to be safe with rate limits
-        try: cores = min(3, multiprocessing.cpu_count())
-        except: cores = 2
-
-        with ctx.Pool(processes=cores) as pool:
-            for i, result in enumerate(pool.imap_unordered(mariner_probe, tasks)):
-                # Save Result
-                self.results_cache.append(result)
+        # One HTTP/2 connection shared by every request in the batch.
+        # The API key is set once on the client instead of per task.
+        async with httpx.AsyncClient(http2=True, timeout=120, headers={"x-goog-api-key": key}) as client:
+            jobs = [mariner_probe(client, sem, limiter, cache, prompt, t) for t in topics]
+            for i, job in enumerate(asyncio.as_completed(jobs)):
+                result = await job
+                
+                # Save Result (written to Excel on the GUI thread)
+                self.queue_put("result", result)
                 
                 # Log to GUI
-                status = result['status']
-                msg = f"[{status}] {result['topic']} ({result['duration']}s)"
+                status = result.status
+                msg = f"[{status}] {result.topic} ({result.duration}s)"
                 self.queue_put("log", msg, status)
                 
                 # Update Progress
                 pct = ((i + 1) / total) * 100
                 self.queue_put("progress", pct)
 
-        self.queue_put("done")
-
     def save_excel(self):
-        if not self.results_cache: return
+        if not self.xlsx_path: return
         path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")])
         if path:
             try:
-                df = pd.DataFrame(self.results_cache)
-                df.to_excel(path, index=False)
+                # Results were already streamed to disk during the batch; just copy them
+                shutil.copyfile(self.xlsx_path, path)
                 messagebox.showinfo("Success", f"Saved to {path}")
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
+    def open_workbook(self, path):
+        if _use_xlsx:
+            self._wb = xlsxwriter.Workbook(path, {'constant_memory': True})
+            self._ws = self._wb.add_worksheet()
+        else:
+            self._wb = openpyxl.Workbook(write_only=True)
+            self._ws = self._wb.create_sheet()
+        self._row = 0
+        self.write_result(EXCEL_HEADERS)
+
+    def write_result(self, rec):
+        # Both writers stream, so rows must be written strictly in order
+        if _use_xlsx:
+            self._ws.write_row(self._row, 0, rec)
+        else:
+            self._ws.append(list(rec))
+        self._row += 1
+
+    def close_workbook(self):
+        if _use_xlsx:
+            self._wb.close()
+        else:
+            self._wb.save(self.xlsx_path)
+
     # Thread Safety Tools
-    def queue_put(self, type, content, tag=None):
-        self.msg_queue.put({"type": type, "content": content, "tag": tag})
+    def setup_wakeup(self):
+        """Wakes the GUI only when a message is queued (no timer polling)."""
+        if hasattr(self.root.tk, "createfilehandler"):
+            # Worker writes one byte per message into a pipe; tk watches the read end
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+            self.root.tk.createfilehandler(self._wake_r, tk.READABLE, self._drain)
+        else:
+            # Windows Tk has no file handlers, so post a virtual event instead
+            self._wake_w = None
+            self.root.bind("<<QueueWake>>", lambda e: self.process_queue())
 
-    def process_queue(self):
+    def _wake(self):
+        if self._wake_w is None:
+            self.root.event_generate("<<QueueWake>>", when="tail")
+            return
+        try:
+            os.write(self._wake_w, b"x")
+        except BlockingIOError:
+            pass # Pipe is full, so a wakeup is already pending
+
+    def _drain(self, fd, mask):
         try:
-            while True:
-                msg = self.msg_queue.get_nowait()
-                if msg['type'] == 'log': self.log(msg['content'], msg['tag'])
-                elif msg['type'] == 'progress': self.progress['value'] = msg['content']
-                elif msg['type'] == 'done':
-                    self.btn_run.config(state="normal")
-                    self.btn_save.config(state="normal")
-                    messagebox.showinfo("Done", "Batch Complete")
-        except queue.Empty:
+            os.read(fd, 4096)
+        except BlockingIOError:
             pass
-        finally:
-            self.root.after(100, self.process_queue)
+        self.process_queue()
+
+    def queue_put(self, type, content=None, tag=None):
+        with self.msg_lock:
+            if type == 'log': self.msg_queue.append((content, tag))
+            elif type == 'result': self.pending_results.append(content)
+            elif type == 'progress': self.latest_progress = content
+            elif type == 'done': self.batch_done = True
+        self._wake()
+
+    def process_queue(self):
+        # Take everything queued so far in one short critical section
+        with self.msg_lock:
+            lines = list(self.msg_queue)
+            self.msg_queue.clear()
+            results, self.pending_results = self.pending_results, []
+            progress, self.latest_progress = self.latest_progress, None
+            done, self.batch_done = self.batch_done, False
+        
+        for rec in results: self.write_result(rec)
+        if progress is not None: self.progress['value'] = progress
+        if done:
+            self.close_workbook()
+            lines.append((f"System: Results written to {self.xlsx_path}", None))
+        
+        # Insert all log lines in one go per drain
+        self.log_lines(lines)
+        
+        if done:
+            self.btn_run.config(state="normal")
+            self.btn_save.config(state="normal")
+            messagebox.showinfo("Done", "Batch Complete")
 
     def log(self, text, tag=None):
+        self.log_lines([(text, tag)])
+
+    def log_lines(self, lines):
+        if not lines: return
+        # A single insert call takes (text, tag) pairs for every line
+        chunks = []
+        for text, tag in lines:
+            chunks += [text + "\n", tag or ()]
         self.txt_log.config(state='normal')
-        self.txt_log.insert(tk.END, text + "\n", tag)
+        self.txt_log.insert(tk.END, *chunks)
+        # Keep only the last MAX_LOG_LINES lines so redraws stay cheap
+        self.txt_log.delete("1.0", f"end-{MAX_LOG_LINES}l")
         self.txt_log.see(tk.END)
         self.txt_log.config(state='disabled')
 
 # ==============================================================================
-# 4. ENTRY POINT (REQUIRED FOR WINDOWS)
+# 4. ENTRY POINT
 # ==============================================================================
 if __name__ == "__main__":
-    multiprocessing.freeze_support()
-    
     # Hide console if needed (Optional)
     # sys.stdout = open(os.devnull, 'w') 
     
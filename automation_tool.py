@@ -1,12 +1,12 @@
 import sys
 import os
 import subprocess
-import importlib
+import importlib.util
 import time
 import random
 import threading
 import multiprocessing
-import queue
+import collections
 import datetime
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
@@ -30,32 +30,57 @@ def check_and_install_packages():
     if getattr(sys, 'frozen', False):
         return
 
-    for package, import_name in required:
-        try:
-            importlib.import_module(import_name)
-        except ImportError:
-            print(f"[*] Installing missing library: {package}...")
-            try:
-                # --user flag is CRITICAL for non-admin installation
-                subprocess.check_call([
-                    sys.executable, "-m", "pip", "install", 
-                    "--user", package, 
-                    "--quiet", "--disable-pip-version-check"
-                ])
-                print(f"[+] {package} installed successfully.")
-            except subprocess.CalledProcessError:
-                print(f"[!] Could not install {package}. Check internet connection.")
+    # find_spec only checks the package exists, without running its import code
+    missing = [package for package, import_name in required if importlib.util.find_spec(import_name) is None]
+    if not missing:
+        return
+
+    # One pip call for everything, so pip starts up only once
+    print(f"[*] Installing missing libraries: {', '.join(missing)}...")
+    try:
+        # --user flag is CRITICAL for non-admin installation
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install", 
+            "--user", *missing, 
+            "--quiet", "--disable-pip-version-check"
+        ])
+        print(f"[+] {', '.join(missing)} installed successfully.")
+    except subprocess.CalledProcessError:
+        print(f"[!] Could not install {', '.join(missing)}. Check internet connection.")
 
 # Run the check immediately
 check_and_install_packages()
 
 # Now it is safe to import them
-import pandas as pd
+# (pandas is heavy, so it is imported on first use via _pd() to keep GUI startup fast)
 import requests
+from requests.adapters import HTTPAdapter
+
+# Log window scrollback limit
+MAX_LOG_LINES = 5000
+
+# Max log lines waiting for the GUI (oldest are dropped beyond this)
+MAX_QUEUED_LOGS = 50000
 
 # ==============================================================================
 # 2. WORKER PROCESS (The "Heavy Lifter")
 # ==============================================================================
+def _pd():
+    global pd
+    import pandas as pd
+    return pd
+
+# One HTTP session per worker process, created by the pool initializer.
+# Reusing it keeps TCP/TLS connections alive across tasks.
+SESSION = None
+
+def init_worker():
+    global SESSION
+    SESSION = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    SESSION.mount("https://", adapter)
+    SESSION.mount("http://", adapter)
+
 def parallel_worker(task_data):
     """
     This function runs on a separate CPU core.
@@ -72,6 +97,8 @@ def parallel_worker(task_data):
         # --- YOUR AUTOMATION LOGIC STARTS HERE ---
         
         # Simulate heavy processing (Replace this with your real code)
+        # For HTTP calls use the shared session, e.g.:
+        #   resp = SESSION.get(url, timeout=10)
         simulation_time = random.uniform(0.5, 2.0)
         time.sleep(simulation_time)
         
@@ -80,7 +107,7 @@ def parallel_worker(task_data):
             raise ConnectionError("Simulated Network Timeout")
             
         # Example Data Processing using Pandas
-        df = pd.DataFrame({'Data': [1, 2, 3]})
+        df = _pd().DataFrame({'Data': [1, 2, 3]})
         processed_val = df.sum() * task_id
         
         log_message = f"Processed {target} | Val: {processed_val}"
@@ -109,12 +136,17 @@ class AutomationBotGUI:
         self.root.geometry("800x600")
         
         # Communication Queue (Thread-Safe)
-        self.msg_queue = queue.Queue()
+        # Log lines go into a bounded ring (oldest dropped if the GUI falls behind).
+        # Progress and "done" are kept separately so they are never dropped.
+        self.msg_lock = threading.Lock()
+        self.msg_queue = collections.deque(maxlen=MAX_QUEUED_LOGS)
+        self.latest_progress = None
+        self.batch_done = False
         
         self.setup_ui()
         
-        # Start checking the queue for updates
-        self.root.after(100, self.process_queue)
+        # Process the queue whenever a worker posts an update
+        self.setup_wakeup()
 
     def setup_ui(self):
         # -- Styles --
@@ -195,7 +227,7 @@ class AutomationBotGUI:
         ctx = multiprocessing.get_context('spawn')
         
         try:
-            with ctx.Pool(processes=cpu_cores) as pool:
+            with ctx.Pool(processes=cpu_cores, initializer=init_worker) as pool:
                 # imap_unordered yields results as soon as they finish
                 for i, result in enumerate(pool.imap_unordered(parallel_worker, tasks)):
                     
@@ -224,35 +256,79 @@ class AutomationBotGUI:
         self.queue_put("done")
 
     # --- Queue Handling (Thread Safety) ---
-    def queue_put(self, msg_type, content=None, tag=None):
-        self.msg_queue.put({"type": msg_type, "content": content, "tag": tag})
+    def setup_wakeup(self):
+        """Wakes the GUI only when a message is queued (no timer polling)."""
+        if hasattr(self.root.tk, "createfilehandler"):
+            # Worker writes one byte per message into a pipe; tk watches the read end
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+            self.root.tk.createfilehandler(self._wake_r, tk.READABLE, self._drain)
+        else:
+            # Windows Tk has no file handlers, so post a virtual event instead
+            self._wake_w = None
+            self.root.bind("<<QueueWake>>", lambda e: self.process_queue())
 
-    def process_queue(self):
-        """Polls queue for messages from background thread"""
+    def _wake(self):
+        if self._wake_w is None:
+            self.root.event_generate("<<QueueWake>>", when="tail")
+            return
         try:
-            while True:
-                msg = self.msg_queue.get_nowait()
-                
-                if msg['type'] == 'log':
-                    self.log(msg['content'], msg['tag'])
-                
-                elif msg['type'] == 'progress':
-                    self.progress_var.set(msg['content'])
-                
-                elif msg['type'] == 'done':
-                    self.btn_run.config(state="normal")
-                    self.lbl_status.config(text="Status: Completed")
-                    messagebox.showinfo("Done", "Automation Batch Finished")
-                    
-        except queue.Empty:
+            os.write(self._wake_w, b"x")
+        except BlockingIOError:
+            pass # Pipe is full, so a wakeup is already pending
+
+    def _drain(self, fd, mask):
+        try:
+            os.read(fd, 4096)
+        except BlockingIOError:
             pass
-        finally:
-            self.root.after(100, self.process_queue) # Check again in 100ms
+        self.process_queue()
+
+    def queue_put(self, msg_type, content=None, tag=None):
+        with self.msg_lock:
+            if msg_type == 'log':
+                self.msg_queue.append((content, tag))
+            elif msg_type == 'progress':
+                self.latest_progress = content
+            elif msg_type == 'done':
+                self.batch_done = True
+        self._wake()
+
+    def process_queue(self):
+        """Drains queued messages from the background thread"""
+        # Take everything queued so far in one short critical section
+        with self.msg_lock:
+            lines = list(self.msg_queue)
+            self.msg_queue.clear()
+            progress, self.latest_progress = self.latest_progress, None
+            done, self.batch_done = self.batch_done, False
+        
+        # Insert all log lines in one go per drain
+        self.log_lines(lines)
+        
+        if progress is not None:
+            self.progress_var.set(progress)
+        
+        if done:
+            self.btn_run.config(state="normal")
+            self.lbl_status.config(text="Status: Completed")
+            messagebox.showinfo("Done", "Automation Batch Finished")
 
     def log(self, message, tag):
+        self.log_lines([(message, tag)])
+
+    def log_lines(self, lines):
+        if not lines: return
         timestamp = datetime.datetime.now().strftime("%H:%M:%S ")
+        # A single insert call takes (text, tag) pairs for every line
+        chunks = []
+        for message, tag in lines:
+            chunks += [timestamp + message + "\n", tag or ()]
         self.log_area.config(state='normal')
-        self.log_area.insert(tk.END, timestamp + message + "\n", tag)
+        self.log_area.insert(tk.END, *chunks)
+        # Keep only the last MAX_LOG_LINES lines so redraws stay cheap
+        self.log_area.delete("1.0", f"end-{MAX_LOG_LINES}l")
         self.log_area.see(tk.END)
         self.log_area.config(state='disabled')
 
@@ -1,8 +1,49 @@
 import os
 import math
 import glob
-from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
-from moviepy.editor import VideoFileClip
+import subprocess
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+def _duration(path):
+    """Reads the container duration (seconds) with ffprobe, no decoding."""
+    return float(subprocess.check_output([
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=nw=1:nk=1", path
+    ]))
+
+def _keyframes(path):
+    """Returns (pts_time, byte_pos) for every keyframe of the first video stream."""
+    out = subprocess.check_output([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,pos,flags", "-of", "csv=p=0", path
+    ], text=True)
+    
+    frames = []
+    for row in out.splitlines():
+        fields = row.split(",")
+        if len(fields) < 3 or "K" not in fields[2]: continue
+        try:
+            frames.append((float(fields[0]), int(fields[1])))
+        except ValueError:
+            continue # pts/pos reported as N/A
+    return frames
+
+def _split_points(keyframes, target_bytes, file_size):
+    """
+    Picks cut times so each part stays under target_bytes: a part ends at the
+    last keyframe before its byte range would exceed the target.
+    """
+    points = []
+    part_start = 0
+    prev = None
+    # End-of-file sentinel, so the final part is checked against the target too
+    for pts, pos in keyframes + [(None, file_size)]:
+        if pos - part_start > target_bytes and prev is not None and prev[1] > part_start:
+            points.append(prev[0])
+            part_start = prev[1]
+        prev = (pts, pos)
+    return points
 
 def split_video_by_size(input_file, target_size_mb=90):
     
@@ -24,40 +65,53 @@ def split_video_by_size(input_file, target_size_mb=90):
     print(f"Total Size: {file_size_bytes / (1024*1024):.2f} MB")
     
     # 4. Get video duration
-    # We use VideoFileClip to get precise duration metadata
+    # ffprobe reads the container header only, no decoding needed
     try:
-        clip = VideoFileClip(input_file)
-        duration_seconds = clip.duration
-        clip.close() # Close the clip to release resources
+        duration_seconds = _duration(input_file)
     except Exception as e:
         print(f"Error reading video metadata: {e}")
         return
 
     # 5. Calculate split parameters
-    # We assume constant bitrate to estimate the duration required for 90MB.
-    # Formula: (Target Size / Total Size) * Total Duration
-    chunk_duration = (target_size_bytes / file_size_bytes) * duration_seconds
-    
-    total_chunks = math.ceil(duration_seconds / chunk_duration)
+    # Stream copy can only cut on keyframes, so pick the cut points from the
+    # keyframe byte offsets. This keeps every part under the target even for
+    # variable-bitrate video.
+    try:
+        split_points = _split_points(_keyframes(input_file), target_size_bytes, file_size_bytes)
+    except Exception as e:
+        print(f"Could not read keyframes ({e}), estimating from bitrate instead.")
+        split_points = []
     
-    print(f"Total Duration: {duration_seconds:.2f} seconds")
-    print(f"Estimated Chunk Duration: {chunk_duration:.2f} seconds")
-    print(f"Splitting into approximately {total_chunks} parts...")
+    if split_points:
+        split_args = ["-segment_times", ",".join(f"{t:.6f}" for t in split_points)]
+        total_chunks = len(split_points) + 1
+        print(f"Total Duration: {duration_seconds:.2f} seconds")
+        print(f"Splitting at keyframes into {total_chunks} parts...")
+    else:
+        # Fallback: assume constant bitrate to estimate the duration required for 90MB.
+        # Formula: (Target Size / Total Size) * Total Duration
+        chunk_duration = (target_size_bytes / file_size_bytes) * duration_seconds
+        split_args = ["-segment_time", f"{chunk_duration:.3f}"]
+        total_chunks = math.ceil(duration_seconds / chunk_duration)
+        print(f"Total Duration: {duration_seconds:.2f} seconds")
+        print(f"Estimated Chunk Duration: {chunk_duration:.2f} seconds")
+        print(f"Splitting into approximately {total_chunks} parts...")
 
     # 6. Split the file
     base_name, ext = os.path.splitext(input_file)
+    target_pattern = f"{base_name}_part%d{ext}"
     
-    for i in range(total_chunks):
-        start_time = i * chunk_duration
-        end_time = min((i + 1) * chunk_duration, duration_seconds)
-        
-        target_name = f"{base_name}_part{i+1}{ext}"
-        
-        print(f"Writing {target_name} ({start_time:.2f}s to {end_time:.2f}s)...")
-        
-        # ffmpeg_extract_subclip performs a "stream copy".
-        # It is very fast and does not re-encode the video (no quality loss).
-        ffmpeg_extract_subclip(input_file, start_time, end_time, targetname=target_name)
+    print(f"Writing {base_name}_part1{ext} .. _part{total_chunks}{ext}...")
+    
+    # A single ffmpeg pass reads the input once and writes every part.
+    # "-c copy" is a stream copy: very fast, no re-encode (no quality loss).
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y", "-i", input_file,
+        "-c", "copy", "-map", "0",
+        "-f", "segment", *split_args,
+        "-segment_start_number", "1", "-reset_timestamps", "1",
+        target_pattern
+    ], check=True)
 
     print("Done! Splitting complete.")
 
@@ -74,6 +128,7 @@ if __name__ == "__main__":
     else:
         print(f"Found {len(video_files)} videos. Starting processing...")
         
-        for video_path in video_files:
-            print(f"\n--- Processing {os.path.basename(video_path)} ---")
-            split_video_by_size(video_path, target_size_mb=90)
\ No newline at end of file
+        # Each job is its own ffmpeg process, so threads are enough to run them in
+        # parallel. Disks saturate at a few concurrent stream copies, so cap at 4.
+        with ThreadPoolExecutor(max_workers=min(4, len(video_files))) as ex:
+            list(ex.map(functools.partial(split_video_by_size, target_size_mb=90), video_files))
\ No newline at end of file
@@ -14,9 +14,14 @@ import os
 import sys
 import json
 import time
+import mmap
+import random
+import socket
+import hashlib
 import subprocess
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging.handlers import RotatingFileHandler
 from typing import List, Optional
 
@@ -47,7 +52,11 @@ def load_config():
         print(Fore.RED + "❌ Error: config.json not found.")
         sys.exit(1)
     with open("config.json", "r") as f:
-        return json.load(f)
+        cfg = json.load(f)
+    # Sets for O(1) lookups in the scan loop (extensions pre-lowered)
+    cfg["allowed_extensions"] = frozenset(x.lower() for x in cfg["allowed_extensions"])
+    cfg["ignore_folders"] = frozenset(cfg["ignore_folders"])
+    return cfg
 
 CONFIG = load_config()
 
@@ -68,9 +77,23 @@ formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
+# Concurrent file hashing. Uploads stay serial: every contents-API call commits
+# to the branch head, so parallel calls conflict (409)
+HASH_WORKERS = 8
+
 # --- CATEGORY 2: ROBUSTNESS (Retry Decorator) ---
+def retry_after(e: Exception) -> Optional[int]:
+    """Seconds GitHub asked us to wait (Retry-After on a 403/429), or None."""
+    if not isinstance(e, GithubException) or e.status not in (403, 429):
+        return None
+    headers = {k.lower(): v for k, v in (getattr(e, "headers", None) or {}).items()}
+    value = headers.get("retry-after")
+    return int(value) if value and value.isdigit() else None
+
 def retry_operation(max_attempts: int = 3, delay: int = 2):
-    """Decorator to retry a function if it fails (Network glitches)."""
+    """Decorator to retry a function if it fails (Network glitches).
+    Waits delay, 2*delay, 4*delay, ... plus up to 1s of jitter between attempts.
+    """
     def decorator(func):
         def wrapper(*args, **kwargs):
             attempts = 0
@@ -80,8 +103,14 @@ def retry_operation(max_attempts: int = 3, delay: int = 2):
                 except Exception as e:
                     attempts += 1
                     logger.warning(f"Attempt {attempts} failed: {e}")
+                    if attempts >= max_attempts:
+                        break
                     print(Fore.YELLOW + f"⚠️  Retry {attempts}/{max_attempts}...")
-                    time.sleep(delay)
+                    # Rate limited: wait as long as GitHub asks, else back off exponentially
+                    wait = retry_after(e)
+                    if wait is None:
+                        wait = delay * (2 ** (attempts - 1)) + random.random()
+                    time.sleep(wait)
             logger.error(f"Operation failed after {max_attempts} attempts.")
             raise Exception("Max retries exceeded")
         return wrapper
@@ -92,33 +121,82 @@ def retry_operation(max_attempts: int = 3, delay: int = 2):
 def check_internet() -> bool:
     """Category 2: Network Check."""
     try:
-        # Check connection to GitHub API
-        subprocess.check_call(["ping", "-n", "1", "api.github.com"], stdout=subprocess.DEVNULL)
+        # Open (and close) a TCP connection to the GitHub API
+        socket.create_connection(("api.github.com", 443), timeout=3).close()
         return True
-    except subprocess.CalledProcessError:
+    except OSError:
         return False
 
+def git_blob_sha(local_path: str) -> str:
+    """Git blob SHA-1 of a file (same as GitHub's contents.sha), hashed from a memory map."""
+    size = os.path.getsize(local_path)
+    h = hashlib.sha1(b"blob %d\0" % size)
+    if size:  # Empty files can't be mapped
+        with open(local_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            h.update(mm)
+    return h.hexdigest()
+
+def read_file(local_path: str) -> bytes:
+    """Reads a file for upload (PyGithub needs the content as bytes)."""
+    with open(local_path, "rb") as f:
+        return f.read()
+
 @retry_operation(max_attempts=CONFIG["max_retries"])
-def upload_file(repo, local_path: str, github_path: str, dry_run: bool):
-    """Category 8: Handles file uploads with retries."""
+def upload_file(repo, tree: dict, local_path: str, github_path: str, local_sha: str, dry_run: bool):
+    """Category 8: Handles file uploads with retries.
+    tree: {path: blob sha} of the files already in the repo (from load_tree).
+    local_sha: git blob sha of the local file (from git_blob_sha).
+    """
     
     if dry_run:
         print(Fore.CYAN + f"   [DRY RUN] Would upload: {github_path}")
         return True
 
-    with open(local_path, "rb") as f:
-        content = f.read()
+    # Existing sha from the cached tree (no get_contents call per file)
+    existing_sha = tree.get(github_path)
 
-    try:
-        contents = repo.get_contents(github_path)
-        # Category 3 (Optimization): Only update if content is different? (Simplified here)
-        repo.update_file(contents.path, f"Update {github_path}", content, contents.sha)
-        print(Fore.GREEN + f"   ✅ Updated: {github_path}")
-        logger.info(f"Updated file: {github_path}")
-    except GithubException:
-        repo.create_file(github_path, f"Create {github_path}", content)
+    # Branch on the tree instead of letting get_contents raise for new files
+    if existing_sha is None:
+        result = repo.create_file(github_path, f"Create {github_path}", read_file(local_path))
         print(Fore.GREEN + f"   ✅ Created: {github_path}")
         logger.info(f"Created file: {github_path}")
+    # Category 3 (Optimization): Only update if content is different
+    elif existing_sha == local_sha:
+        print(Fore.WHITE + f"   ⏭️  Unchanged: {github_path}")
+        logger.info(f"Unchanged file: {github_path}")
+    else:
+        result = repo.update_file(github_path, f"Update {github_path}", read_file(local_path), existing_sha)
+        print(Fore.GREEN + f"   ✅ Updated: {github_path}")
+        logger.info(f"Updated file: {github_path}")
+
+    # Keep the cached tree in sync with the repo for any later upload of this path
+    if existing_sha != local_sha:
+        tree[github_path] = result["content"].sha
+
+def iter_files(root: str, ignore_folders: frozenset, allowed_extensions: frozenset):
+    """Category 8: Recursively yields files with an allowed extension, skipping ignored folders.
+    Uses os.scandir directly so file/dir checks come from the cached DirEntry type.
+    """
+    try:
+        entries = os.scandir(root)
+    except OSError as e:
+        # Unreadable or vanished folder: skip it like os.walk did
+        logger.warning(f"Skipping {root}: {e}")
+        return
+    with entries:
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                if e.name not in ignore_folders:
+                    yield from iter_files(e.path, ignore_folders, allowed_extensions)
+            elif e.is_file():
+                # Extension Filter
+                if os.path.splitext(e.name)[1].lower() in allowed_extensions:
+                    yield e.path
+
+def load_tree(repo) -> dict:
+    """Fetches {path: blob sha} for every file on the default branch in one API call."""
+    git_tree = repo.get_git_tree(repo.default_branch, recursive=True)
+    return {e.path: e.sha for e in git_tree.tree if e.type == "blob"}
 
 def main():
     # --- CATEGORY 7: FEATURES (Argparse for Dry Run) ---
@@ -148,6 +226,12 @@ def main():
         print(Fore.RED + f"❌ Auth Failed: {e}")
         return
 
+    # Existing files, fetched once instead of one get_contents per upload
+    try:
+        tree = load_tree(repo)
+    except GithubException:
+        tree = {}  # Empty repository (no default branch yet)
+
     # 3. Recursive Scan
     source_folder = CONFIG["source_folder"]
     if not os.path.exists(source_folder):
@@ -157,31 +241,44 @@ def main():
     count_success = 0
     count_errors = 0
 
-    for root, dirs, files in os.walk(source_folder):
-        # Ignore folders
-        dirs[:] = [d for d in dirs if d not in CONFIG["ignore_folders"]]
-
-        for file_name in files:
-            full_path = os.path.join(root, file_name)
-            _, ext = os.path.splitext(file_name)
+    ignore_folders = CONFIG["ignore_folders"]
+    allowed_extensions = CONFIG["allowed_extensions"]
 
-            # Category 8: Extension Filter
-            if ext.lower() not in CONFIG["allowed_extensions"]:
-                continue
+    # Collect (local path, GitHub path) pairs first
+    tasks = []
+    for full_path in iter_files(source_folder, ignore_folders, allowed_extensions):
+        # Calculate GitHub Path
+        rel_path = os.path.relpath(full_path, source_folder)
+        github_path = rel_path.replace("\\", "/")
+        tasks.append((full_path, github_path))
 
-            # Calculate GitHub Path
-            rel_path = os.path.relpath(full_path, source_folder)
-            github_path = rel_path.replace("\\", "/")
+    print(f"⬆️  Uploading {len(tasks)} files...")
 
-            print(f"⬆️  Processing: {github_path}...", end=" ")
+    # Hash in a thread pool (without loading the files; content is only read if it must be uploaded)
+    shas = {}
+    if not args.dry_run:
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as ex:
+            futures = {ex.submit(git_blob_sha, lp): gp for lp, gp in tasks}
+            for fut in as_completed(futures):
+                github_path = futures[fut]
+                try:
+                    shas[github_path] = fut.result()
+                except OSError as e:
+                    print(Fore.RED + f"❌ Failed: {github_path}: {e}")
+                    logger.error(f"Failed to read {github_path}: {e}")
+                    count_errors += 1
 
-            try:
-                upload_file(repo, full_path, github_path, args.dry_run)
-                count_success += 1
-            except Exception as e:
-                print(Fore.RED + f"\n❌ Failed: {e}")
-                logger.error(f"Failed to upload {github_path}: {e}")
-                count_errors += 1
+    # Upload one at a time: each create/update is a commit on the branch head
+    for local_path, github_path in tasks:
+        if not args.dry_run and github_path not in shas:
+            continue  # Couldn't be hashed (already counted as an error)
+        try:
+            upload_file(repo, tree, local_path, github_path, shas.get(github_path), args.dry_run)
+            count_success += 1
+        except Exception as e:
+            print(Fore.RED + f"❌ Failed: {github_path}: {e}")
+            logger.error(f"Failed to upload {github_path}: {e}")
+            count_errors += 1
 
     # Final Report
     print("-" * 50)
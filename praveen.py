@@ -1,7 +1,9 @@
 import cv2
 import torch
+import torch.nn.functional as F
 import numpy as np
 import os
+import subprocess
 from transformers import pipeline
 from PIL import Image
 
@@ -19,6 +21,13 @@ SHIFT_INTENSITY = 8
 # Set to True for better quality, False for faster speed.
 USE_INPAINTING = True 
 
+# Number of frames sent to the depth model in one forward pass.
+# Larger is faster on GPU but needs more memory (try 4-8 on small GPUs).
+BATCH_SIZE = 16
+
+# ffmpeg encoder for the output video (use "h264_nvenc" to encode on an NVIDIA GPU)
+VIDEO_CODEC = "libx264"
+
 # ==========================================
 # PROCESSING LOGIC
 # ==========================================
@@ -33,48 +42,195 @@ def load_depth_model():
     # We use the 'Small' version for a good balance of speed and quality.
     # You can swap 'Small' with 'Base' or 'Large' if you have a powerful GPU.
     pipe = pipeline(task="depth-estimation", model="depth-anything/Depth-Anything-V2-Small-hf", device=device)
+    
+    if torch.cuda.is_available():
+        # FP16 + channels_last halves memory traffic and uses the GPU tensor cores
+        pipe.model = pipe.model.half().to(memory_format=torch.channels_last)
+        # Frame size is fixed for a video, so let cuDNN pick the fastest kernels once
+        torch.backends.cudnn.benchmark = True
     return pipe
 
-def warp_and_fill(img, depth, shift, direction):
+def make_coord_grids(width, height):
+    """
+    Builds the pixel coordinate grids once per video (float32, as cv2.remap wants).
+    """
+    return np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+
+def make_frame_buffers(width, height):
+    """
+    Allocates the per-frame work buffers once per video; warp_and_fill and
+    normalize_depth write into these instead of allocating new arrays every frame.
+    """
+    return {
+        "depth":     np.empty((height, width), np.float32),    # normalized depth
+        "x_shifted": np.empty((height, width), np.float32),    # shifted X map / hole fill map
+        "gray":      np.empty((height, width), np.uint8),      # hole detection
+        "warped":    np.empty((height, width, 3), np.uint8),   # warped view
+        "filled":    np.empty((height, width, 3), np.uint8),   # warped view after hole filling
+    }
+
+def normalize_depth(depth, dst=None):
     """
-    Warps the image pixels and uses Inpainting to fill the empty gaps.
+    Normalizes a depth map to the 0.0 - 1.0 range as float32 (into dst if given).
+    """
+    return cv2.normalize(depth, dst, 0, 1, cv2.NORM_MINMAX, dtype=cv2.CV_32F)
+
+def warp_and_fill(img, depth_norm, shift, direction, x_coords, y_coords, bufs):
+    """
+    Warps the image pixels and fills the empty gaps from neighbouring pixels.
+    depth_norm: depth map from normalize_depth()
     direction: 1 = Left Eye, -1 = Right Eye
+    x_coords, y_coords: grids from make_coord_grids()
+    bufs: buffers from make_frame_buffers(); the returned view is one of them,
+          so it is only valid until the next call
     """
     h, w, c = img.shape
+    x_shifted = bufs["x_shifted"]
     
-    # Normalize depth map to 0.0 - 1.0 range
-    depth_min = depth.min()
-    depth_max = depth.max()
-    depth_norm = (depth - depth_min) / (depth_max - depth_min)
-    
-    # Create the flow map: Foreground (high depth) shifts more than background.
-    flow = depth_norm * shift * direction
-
-    # Create coordinate grid
-    x_coords, y_coords = np.meshgrid(np.arange(w), np.arange(h))
-    
-    # Apply the shift to X coordinates
-    x_shifted = x_coords + flow
-    x_shifted = np.clip(x_shifted, 0, w - 1).astype(np.float32)
+    # Shift X coordinates: Foreground (high depth) shifts more than background.
+    # Computed in place to avoid allocating temporaries every frame.
+    np.multiply(depth_norm, shift * direction, out=x_shifted)
+    np.add(x_shifted, x_coords, out=x_shifted)
+    np.clip(x_shifted, 0, w - 1, out=x_shifted)
     
     # Remap (Warp) the image
     # We use BORDER_CONSTANT to leave black gaps where pixels moved away
-    warped = cv2.remap(img, x_shifted, y_coords.astype(np.float32), cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=(0,0,0))
+    warped = cv2.remap(img, x_shifted, y_coords, cv2.INTER_LINEAR, dst=bufs["warped"], borderMode=cv2.BORDER_CONSTANT, borderValue=(0,0,0))
     
     # -- INPAINTING STEP --
     if USE_INPAINTING:
         # Convert to grayscale to find the black holes (pixels that are 0,0,0)
-        gray = cv2.cvtColor(warped, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(warped, cv2.COLOR_BGR2GRAY, dst=bufs["gray"])
         
-        # Create a mask: 255 where the image is black (hole), 0 otherwise
-        mask = (gray == 0).astype(np.uint8) * 255
+        # Create a mask: True where the image is black (hole)
+        holes = gray == 0
         
-        # Apply inpainting: Fills holes based on surrounding pixel data
-        # radius=3 is usually sufficient for 3D shifts
-        warped = cv2.inpaint(warped, mask, 3, cv2.INPAINT_TELEA)
+        if holes.any():
+            # Fill each hole from the nearest valid pixel to its left in the same row.
+            # Much cheaper than cv2.inpaint and looks the same for thin stereo gaps.
+            # The shifted X map is no longer needed, so reuse it for the fill map.
+            fill_x = x_shifted
+            np.copyto(fill_x, x_coords)
+            fill_x[holes] = 0
+            np.maximum.accumulate(fill_x, axis=1, out=fill_x)
+            warped = cv2.remap(warped, fill_x, y_coords, cv2.INTER_NEAREST, dst=bufs["filled"])
         
     return warped
 
+def probe_video(path):
+    """
+    Reads width, height, fps and frame count of the first video stream with ffprobe.
+    """
+    out = subprocess.check_output([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,r_frame_rate,nb_frames",
+        "-of", "default=nw=1", path
+    ], text=True)
+    info = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+    
+    num, den = info["r_frame_rate"].split("/")
+    fps = float(num) / float(den)
+    nb_frames = info.get("nb_frames", "")
+    total_frames = int(nb_frames) if nb_frames.isdigit() else 0
+    return int(info["width"]), int(info["height"]), fps, total_frames
+
+def open_reader(path):
+    """
+    Starts ffmpeg decoding the video to raw BGR frames on stdout (multi-threaded decode).
+    """
+    return subprocess.Popen([
+        "ffmpeg", "-v", "error", "-i", path,
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "-"
+    ], stdout=subprocess.PIPE)
+
+def open_writer(path, width, height, fps):
+    """
+    Starts ffmpeg encoding raw BGR frames written to its stdin.
+    """
+    return subprocess.Popen([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        "-c:v", VIDEO_CODEC, "-preset", "fast", "-pix_fmt", "yuv420p", path
+    ], stdin=subprocess.PIPE)
+
+# ==========================================
+# GPU PATH (used when CUDA is available)
+# ==========================================
+# Depth maps stay on the GPU from the model output to the warp; only the
+# finished views are copied back for encoding.
+
+def make_gpu_grids(width, height, device):
+    """
+    Builds the pixel X grid and the grid_sample Y grid (-1 .. 1) once per video.
+    """
+    x_coords = torch.arange(width, dtype=torch.float32, device=device).expand(height, width)
+    y_norm = torch.linspace(-1, 1, height, device=device).unsqueeze(1).expand(height, width)
+    return x_coords, y_norm
+
+def estimate_depth_gpu(depth_pipe, pil_imgs, width, height):
+    """
+    Runs the depth model directly (the pipeline would copy its outputs to the CPU)
+    and returns depth maps normalized to 0.0 - 1.0 as a (B, H, W) float32 GPU tensor.
+    """
+    inputs = depth_pipe.image_processor(images=pil_imgs, return_tensors="pt")
+    pixel_values = inputs["pixel_values"].to(depth_pipe.device, dtype=depth_pipe.model.dtype)
+    depth = depth_pipe.model(pixel_values=pixel_values).predicted_depth
+    
+    # Resize to the video resolution on the GPU
+    depth = F.interpolate(depth.unsqueeze(1).float(), size=(height, width), mode="bilinear", align_corners=False).squeeze(1)
+    
+    # Min-max normalize each frame (same as normalize_depth)
+    d_min = depth.amin(dim=(1, 2), keepdim=True)
+    d_max = depth.amax(dim=(1, 2), keepdim=True)
+    return (depth - d_min) / (d_max - d_min).clamp_min(1e-6)
+
+def warp_and_fill_gpu(img, depth_norm, shift, direction, x_coords, y_norm):
+    """
+    GPU version of warp_and_fill.
+    img: (3, H, W) float32 BGR frame tensor, depth_norm: (H, W) from estimate_depth_gpu()
+    x_coords, y_norm: grids from make_gpu_grids()
+    Returns the view as an (H, W, 3) uint8 numpy array.
+    """
+    c, h, w = img.shape
+    
+    # Shift X coordinates, then sample with grid_sample (coordinates in -1 .. 1)
+    x_shifted = (depth_norm * (shift * direction) + x_coords).clamp_(0, w - 1)
+    grid = torch.stack((x_shifted * (2 / (w - 1)) - 1, y_norm), dim=-1).unsqueeze(0)
+    warped = F.grid_sample(img.unsqueeze(0), grid, mode="bilinear", padding_mode="zeros", align_corners=True)[0]
+    warped = warped.round_()
+    
+    # -- INPAINTING STEP --
+    if USE_INPAINTING:
+        # Black holes: pixels whose grayscale value rounds to 0
+        gray = 0.114 * warped[0] + 0.587 * warped[1] + 0.299 * warped[2]
+        holes = gray < 0.5
+        
+        if holes.any():
+            # Fill each hole from the nearest valid pixel to its left in the same row
+            fill_x = torch.where(holes, torch.zeros_like(x_coords), x_coords)
+            fill_x = torch.cummax(fill_x, dim=1).values.long()
+            warped = warped.gather(2, fill_x.unsqueeze(0).expand(c, h, w))
+    
+    return warped.to(torch.uint8).permute(1, 2, 0).contiguous().cpu().numpy()
+
+def read_batches(reader, width, height, batch_size):
+    """
+    Yields lists of up to batch_size frames from the ffmpeg reader, in order.
+    """
+    frame_bytes = width * height * 3
+    batch = []
+    while True:
+        buf = reader.stdout.read(frame_bytes)
+        if len(buf) < frame_bytes:
+            break
+        frame = np.frombuffer(buf, np.uint8).reshape(height, width, 3)
+        batch.append(frame)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 def convert_video():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
@@ -86,62 +242,84 @@ def convert_video():
     # 1. Load Model
     depth_pipe = load_depth_model()
 
-    # 2. Open Video Source
-    cap = cv2.VideoCapture(VIDEO_FILE_PATH)
-    if not cap.isOpened():
+    # 2. Open Video Source (decoded by ffmpeg)
+    try:
+        width, height, fps, total_frames = probe_video(VIDEO_FILE_PATH)
+    except (subprocess.CalledProcessError, KeyError, ValueError):
         print("Error opening video file.")
         return
-
-    width  = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps    = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    reader = open_reader(VIDEO_FILE_PATH)
 
     # 3. Setup Video Writer (Double FPS for Frame Sequential)
     output_fps = fps * 2
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, output_fps, (width, height))
+    out = open_writer(output_path, width, height, output_fps)
 
     print(f"Processing {total_frames} frames with high-quality settings...")
     
+    # Calculate maximum pixel shift
+    max_shift = int(width * (SHIFT_INTENSITY / 100))
+    
+    # Coordinate grids and shift buffer are the same for every frame
+    use_gpu = torch.cuda.is_available()
+    if use_gpu:
+        gpu_x_coords, gpu_y_norm = make_gpu_grids(width, height, depth_pipe.device)
+    else:
+        x_coords, y_coords = make_coord_grids(width, height)
+        bufs = make_frame_buffers(width, height)
+    
     frame_idx = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    for frames in read_batches(reader, width, height, BATCH_SIZE):
 
         # -- AI INFERENCE --
         # Convert BGR (OpenCV) to RGB (PIL) for the AI model
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(img_rgb)
+        pil_imgs = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for frame in frames]
         
-        # Get depth map
-        depth_result = depth_pipe(pil_img)
-        depth_map = np.array(depth_result["depth"])
+        if use_gpu:
+            with torch.inference_mode():
+                # Depth maps for the whole batch in one forward pass, kept on the GPU
+                with torch.autocast("cuda", dtype=torch.float16):
+                    depth_norms = estimate_depth_gpu(depth_pipe, pil_imgs, width, height)
+                
+                # Upload the frames once per batch
+                frames_t = torch.from_numpy(np.stack(frames)).to(depth_pipe.device).permute(0, 3, 1, 2).float()
+                
+                for frame_t, depth_norm in zip(frames_t, depth_norms):
+                    # -- GENERATE AND WRITE SEQUENTIAL FRAMES --
+                    # Left Eye (direction +1), then Right Eye (direction -1)
+                    out.stdin.write(warp_and_fill_gpu(frame_t, depth_norm, max_shift, 1, gpu_x_coords, gpu_y_norm))
+                    out.stdin.write(warp_and_fill_gpu(frame_t, depth_norm, max_shift, -1, gpu_x_coords, gpu_y_norm))
+                    frame_idx += 1
+            print(f"Processed Frame {frame_idx}/{total_frames}", end='\r')
+            continue
         
-        # Resize depth map to match video resolution exactly
-        depth_map = cv2.resize(depth_map, (width, height))
-
-        # -- GENERATE VIEWS --
-        # Calculate maximum pixel shift
-        max_shift = int(width * (SHIFT_INTENSITY / 100))
-        
-        # Generate Left and Right views with hole filling
-        # Left Eye (Shift content Right, direction +1)
-        left_view = warp_and_fill(frame, depth_map, max_shift, 1)
+        # Get depth maps for the whole batch in one forward pass
+        with torch.inference_mode():
+            depth_results = depth_pipe(pil_imgs, batch_size=BATCH_SIZE)
         
-        # Right Eye (Shift content Left, direction -1)
-        right_view = warp_and_fill(frame, depth_map, max_shift, -1)
+        for frame, depth_result in zip(frames, depth_results):
+            depth_map = np.array(depth_result["depth"])
+            
+            # Resize depth map to match video resolution exactly
+            depth_map = cv2.resize(depth_map, (width, height))
+            depth_norm = normalize_depth(depth_map, bufs["depth"])
 
-        # -- WRITE SEQUENTIAL FRAMES --
-        out.write(left_view)
-        out.write(right_view)
-        
-        frame_idx += 1
+            # -- GENERATE AND WRITE SEQUENTIAL FRAMES --
+            # Each view is written before the next is generated, since both share the buffers
+            # Left Eye (Shift content Right, direction +1)
+            left_view = warp_and_fill(frame, depth_norm, max_shift, 1, x_coords, y_coords, bufs)
+            out.stdin.write(left_view)
+            
+            # Right Eye (Shift content Left, direction -1)
+            right_view = warp_and_fill(frame, depth_norm, max_shift, -1, x_coords, y_coords, bufs)
+            out.stdin.write(right_view)
+            
+            frame_idx += 1
         print(f"Processed Frame {frame_idx}/{total_frames}", end='\r')
 
-    cap.release()
-    out.release()
+    reader.stdout.close()
+    reader.wait()
+    out.stdin.close()
+    out.wait()
     print(f"\nDone! High Quality video saved to:\n{output_path}")
 
 if __name__ == "__main__":
@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
 import os
-import re
+import io
 import glob
+from concurrent.futures import ProcessPoolExecutor
+
+# Numba is optional: with it the tokenizer runs as compiled code over the raw
+# file bytes, without it we fall back to the pure-Python tokenizer.
+try:
+    import numpy as np
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
 
 # -------------------------
 # Configuration
@@ -12,12 +22,15 @@ CONFIG = {
     "FILE_PATTERN": "*.dyn"
 }
 
+# Output lines buffered before each write
+FLUSH_LINES = 8192
+
 # -------------------------
 # Robust Helpers
 # -------------------------
 def safe_int(value):
     """
-    Safely converts a string to an integer.
+    Safely converts a string (str or bytes) to an integer.
     Returns None if the value is not a valid number (e.g., 'mm', 'Part', etc.)
     """
     try:
@@ -36,6 +49,129 @@ def safe_int(value):
 def is_odd(n):
     return n % 2 != 0
 
+# -------------------------
+# Tokenizer
+# -------------------------
+# Integer tokens kept per line (LS-DYNA cards have at most 10 fields per line)
+MAX_TOKENS = 10
+# Marks a token that is not an integer in the compiled tokenizer's output
+NO_INT = -(2 ** 63)
+
+# Commas and whitespace both separate fields; str.split() is much faster than a regex
+_split = lambda s: s.replace(b',', b' ').split()
+
+if HAVE_NUMBA:
+    @njit(cache=True)
+    def _is_sep(c):
+        return c == 44 or c == 32 or 9 <= c <= 13
+
+    @njit(cache=True)
+    def _parse_int(buf, i, j):
+        """Integer value of token buf[i:j], read the same way as safe_int, or NO_INT."""
+        if i == j: return NO_INT
+        neg = False
+        if buf[i] == 43 or buf[i] == 45: # '+' / '-'
+            neg = buf[i] == 45
+            i += 1
+        
+        # Mantissa digits (with optional '.')
+        mant = 0
+        n_digits = 0
+        frac_digits = 0
+        seen_dot = False
+        while i < j:
+            c = buf[i]
+            if 48 <= c <= 57:
+                mant = mant * 10 + (c - 48)
+                n_digits += 1
+                if seen_dot: frac_digits += 1
+            elif c == 46 and not seen_dot:
+                seen_dot = True
+            else:
+                break
+            i += 1
+        if n_digits == 0: return NO_INT
+        
+        # Optional exponent
+        exp = 0
+        if i < j:
+            if buf[i] != 101 and buf[i] != 69: return NO_INT # 'e' / 'E'
+            i += 1
+            exp_neg = False
+            if i < j and (buf[i] == 43 or buf[i] == 45):
+                exp_neg = buf[i] == 45
+                i += 1
+            if i == j: return NO_INT
+            while i < j:
+                c = buf[i]
+                if c < 48 or c > 57: return NO_INT
+                exp = exp * 10 + (c - 48)
+                i += 1
+            if exp_neg: exp = -exp
+        
+        # Value is mant * 10**exp; only exact integers count (like float.is_integer)
+        exp -= frac_digits
+        if exp > 18: return NO_INT
+        while exp < 0:
+            if mant % 10 != 0: return NO_INT
+            mant //= 10
+            exp += 1
+        while exp > 0:
+            mant *= 10
+            exp -= 1
+        return -mant if neg else mant
+
+    @njit(cache=True)
+    def _scan_ints(buf, max_tokens):
+        """
+        Splits buf into lines on '\n' and each line into tokens exactly like
+        _split(line). Returns (toks, ntok): the integer value
+        of the first max_tokens tokens of every line (NO_INT if not an integer)
+        and the number of tokens on each line.
+        """
+        n = buf.size
+        n_lines = 1
+        for k in range(n):
+            if buf[k] == 10: n_lines += 1
+        
+        toks = np.full((n_lines, max_tokens), NO_INT, np.int64)
+        ntok = np.zeros(n_lines, np.int32)
+        
+        pos = 0
+        for line in range(n_lines):
+            end = pos
+            while end < n and buf[end] != 10: end += 1
+            
+            k = 0
+            start = pos
+            while True:
+                while start < end and _is_sep(buf[start]): start += 1
+                if start >= end: break
+                stop = start
+                while stop < end and not _is_sep(buf[stop]): stop += 1
+                if k < max_tokens:
+                    toks[line, k] = _parse_int(buf, start, stop)
+                k += 1
+                start = stop
+            ntok[line] = k
+            pos = end + 1
+        return toks, ntok
+
+def tokenize_lines(raw, lines):
+    """
+    Returns line_ints(i): the tokens of lines[i] as integers (None where a token
+    is not a number), i.e. [safe_int(t) for t in _split(line)].
+    """
+    if HAVE_NUMBA:
+        # Tokenize the whole file once in compiled code
+        toks, ntok = _scan_ints(np.frombuffer(raw, np.uint8), MAX_TOKENS)
+        def line_ints(i):
+            return [None if v == NO_INT else v for v in toks[i, :ntok[i]].tolist()]
+    else:
+        def line_ints(i):
+            return [safe_int(t) for t in _split(lines[i])]
+    return line_ints
+
 def extract_odd_components(input_file, output_file):
     print(f"Processing: {os.path.basename(input_file)}...")
     
@@ -46,11 +182,16 @@ def extract_odd_components(input_file, output_file):
     
     # Read file safely
     try:
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        with open(input_file, 'rb') as f:
+            raw = f.read().replace(b'\r\n', b'\n')
     except Exception as e:
         print(f"  [ERR] Could not read file {input_file}: {e}")
         return
+    
+    # Work on bytes throughout (no decode); split on '\n' only, so line
+    # numbers match the tokenizer's
+    lines = io.BytesIO(raw).readlines()
+    line_ints = tokenize_lines(raw, lines)
         
     n = len(lines)
 
@@ -59,18 +200,18 @@ def extract_odd_components(input_file, output_file):
     i = 0
     while i < n:
         line = lines[i].strip()
-        if line.startswith('*PART'):
+        if line.startswith(b'*PART'):
             # Scan ahead 1-4 lines to find the data line (skipping $comments)
             for offset in range(1, 5):
                 if i + offset >= n: break
                 look = lines[i+offset].strip()
-                if look.startswith('*'): break
-                if look.startswith('$'): continue
+                if look.startswith(b'*'): break
+                if look.startswith(b'$'): continue
                 
                 # Tokenize
-                tokens = re.split(r'[,\s]+', look)
+                tokens = line_ints(i + offset)
                 if len(tokens) >= 1:
-                    pid = safe_int(tokens[0])
+                    pid = tokens[0]
                     
                     if pid is not None and is_odd(pid):
                         keep_pids.add(pid)
@@ -78,11 +219,11 @@ def extract_odd_components(input_file, output_file):
                         # Extract SECID (Index 1) and MID (Index 2) if available
                         # Standard PART format: PID, SECID, MID, ...
                         if len(tokens) > 1:
-                            sid = safe_int(tokens[1])
+                            sid = tokens[1]
                             if sid is not None: keep_sec_ids.add(sid)
                         
                         if len(tokens) > 2:
-                            mid = safe_int(tokens[2])
+                            mid = tokens[2]
                             if mid is not None: keep_mat_ids.add(mid)
                 break
         i += 1
@@ -95,26 +236,32 @@ def extract_odd_components(input_file, output_file):
     # --- PASS 2: Find Elements & Nodes linked to these PIDs ---
     # Keywords for elements (Expanded to include Discrete and Mass)
     element_keywords = (
-        '*ELEMENT_SHELL', '*ELEMENT_SOLID', '*ELEMENT_BEAM', 
-        '*ELEMENT_TSHELL', '*ELEMENT_DISCRETE', '*ELEMENT_MASS'
+        b'*ELEMENT_SHELL', b'*ELEMENT_SOLID', b'*ELEMENT_BEAM', 
+        b'*ELEMENT_TSHELL', b'*ELEMENT_DISCRETE', b'*ELEMENT_MASS'
     )
     
+    # Element block header line -> (end line, lines to write), so PASS 3 can
+    # write element blocks without tokenizing them again
+    element_blocks = {}
+    
     i = 0
     while i < n:
         line = lines[i].strip()
         if line.startswith(element_keywords):
             # Process this element block
+            block_lines = []
             j = i + 1
             while j < n:
                 el_line = lines[j].strip()
-                if el_line.startswith('*'): break
-                if el_line.startswith('$'): 
+                if el_line.startswith(b'*'): break
+                if el_line.startswith(b'$'): 
+                    block_lines.append(j)
                     j += 1; continue
                 
-                tokens = re.split(r'[,\s]+', el_line)
+                tokens = line_ints(j)
                 
                 if len(tokens) > 2:
-                    pid = safe_int(tokens[1])
+                    pid = tokens[1]
                     
                     if pid is not None and pid in keep_pids:
                         # Standard Elements start nodes at index 2
@@ -125,17 +272,19 @@ def extract_odd_components(input_file, output_file):
                         # For robustness with MASS linked to PIDs, we assume standard index 1 is PID or NID.
                         # If the line is *ELEMENT_MASS, token[1] is NID usually.
                         
-                        if line.startswith('*ELEMENT_MASS'):
+                        if line.startswith(b'*ELEMENT_MASS'):
                             # For Mass, if we found it via PID (rarely stored in line), keep node.
                             # But usually Mass is kept if Node is kept. 
                             # Here we just scan for PIDs in standard elements to build the Node List first.
                             pass 
                         else:
-                            for t in tokens[start_index:]:
-                                nid = safe_int(t)
+                            block_lines.append(j)
+                            for nid in tokens[start_index:]:
                                 if nid is not None:
                                     keep_node_ids.add(nid)
                 j += 1
+            if not line.startswith(b'*ELEMENT_MASS'):
+                element_blocks[i] = (j, block_lines)
             i = j
             continue
         i += 1
@@ -145,104 +294,101 @@ def extract_odd_components(input_file, output_file):
     print(f"  -> Identified {len(keep_mat_ids)} related Materials.")
 
     # --- PASS 3: Write Output File ---
-    with open(output_file, 'w', encoding='utf-8') as out:
-        out.write("*KEYWORD\n")
-        out.write(f"$ Extracted Odd Components from {os.path.basename(input_file)}\n")
-        out.write(f"$ Proper DYNA File for Visualization\n")
+    with open(output_file, 'wb') as out:
+        out.write(b"*KEYWORD\n")
+        out.write(f"$ Extracted Odd Components from {os.path.basename(input_file)}\n".encode())
+        out.write(b"$ Proper DYNA File for Visualization\n")
+        
+        # Collect output lines and write them in large chunks
+        buf = []
         
         i = 0
         while i < n:
+            if len(buf) > FLUSH_LINES:
+                out.write(b''.join(buf)); buf.clear()
+            
             line = lines[i]
             line_strip = line.strip()
             
             # 1. Handle NODES
-            if line_strip.startswith('*NODE'):
-                out.write(line) 
+            if line_strip.startswith(b'*NODE'):
+                buf.append(line) 
                 j = i + 1
                 while j < n:
+                    if len(buf) > FLUSH_LINES:
+                        out.write(b''.join(buf)); buf.clear()
                     node_line = lines[j]
-                    if node_line.strip().startswith('*'): break
+                    if node_line.strip().startswith(b'*'): break
                     
                     # Preserve Comments
-                    if node_line.strip().startswith('$'): 
-                        out.write(node_line)
+                    if node_line.strip().startswith(b'$'): 
+                        buf.append(node_line)
                         j += 1; continue
                     
-                    tokens = re.split(r'[,\s]+', node_line.strip())
+                    tokens = line_ints(j)
                     if tokens:
-                        nid = safe_int(tokens[0])
+                        nid = tokens[0]
                         if nid is not None and nid in keep_node_ids:
-                            out.write(node_line)
+                            buf.append(node_line)
                     j += 1
                 i = j
                 continue
 
             # 2. Handle ELEMENTS (Standard)
-            elif line_strip.startswith(element_keywords) and not line_strip.startswith('*ELEMENT_MASS'):
-                out.write(line)
-                j = i + 1
-                while j < n:
-                    el_line = lines[j]
-                    if el_line.strip().startswith('*'): break
-                    if el_line.strip().startswith('$'): 
-                         out.write(el_line)
-                         j += 1; continue
-                    
-                    tokens = re.split(r'[,\s]+', el_line.strip())
-                    if len(tokens) > 2:
-                        pid = safe_int(tokens[1])
-                        if pid is not None and pid in keep_pids:
-                            out.write(el_line)
-                    j += 1
+            elif line_strip.startswith(element_keywords) and not line_strip.startswith(b'*ELEMENT_MASS'):
+                # Reuse the PID matches from PASS 2
+                buf.append(line)
+                j, block_lines = element_blocks[i]
+                buf.extend([lines[k] for k in block_lines])
                 i = j
                 continue
 
             # 3. Handle MASS ELEMENTS (Keep if attached to kept Node)
-            elif line_strip.startswith('*ELEMENT_MASS'):
-                out.write(line)
+            elif line_strip.startswith(b'*ELEMENT_MASS'):
+                buf.append(line)
                 j = i + 1
                 while j < n:
                     el_line = lines[j]
-                    if el_line.strip().startswith('*'): break
-                    if el_line.strip().startswith('$'):
-                        out.write(el_line)
+                    if el_line.strip().startswith(b'*'): break
+                    if el_line.strip().startswith(b'$'):
+                        buf.append(el_line)
                         j += 1; continue
 
-                    tokens = re.split(r'[,\s]+', el_line.strip())
+                    tokens = line_ints(j)
                     if len(tokens) > 1:
-                        nid = safe_int(tokens[1])
+                        nid = tokens[1]
                         if nid is not None and nid in keep_node_ids:
-                            out.write(el_line)
+                            buf.append(el_line)
                     j += 1
                 i = j
                 continue
 
             # 4. Handle PARTS
-            elif line_strip.startswith('*PART'):
+            elif line_strip.startswith(b'*PART'):
                 buffer_block = [line]
                 is_target_part = False
                 
                 j = i + 1
                 while j < n:
                     p_line = lines[j]
-                    if p_line.strip().startswith('*'): break
+                    if p_line.strip().startswith(b'*'): break
                     buffer_block.append(p_line)
                     
-                    if not p_line.strip().startswith('$') and not is_target_part:
-                        tokens = re.split(r'[,\s]+', p_line.strip())
+                    if not p_line.strip().startswith(b'$') and not is_target_part:
+                        tokens = line_ints(j)
                         if tokens:
-                            pid = safe_int(tokens[0])
+                            pid = tokens[0]
                             if pid is not None and pid in keep_pids:
                                 is_target_part = True
                     j += 1
                 
                 if is_target_part:
-                    for b in buffer_block: out.write(b)
+                    buf.extend(buffer_block)
                 i = j 
                 continue
 
             # 5. Handle SECTIONS (Filtered by ID)
-            elif line_strip.startswith(('*SECTION_SHELL', '*SECTION_BEAM', '*SECTION_SOLID', '*SECTION_DISCRETE')):
+            elif line_strip.startswith((b'*SECTION_SHELL', b'*SECTION_BEAM', b'*SECTION_SOLID', b'*SECTION_DISCRETE')):
                 # Buffer to check ID
                 buffer_block = [line]
                 is_target_sec = False
@@ -250,25 +396,25 @@ def extract_odd_components(input_file, output_file):
                 j = i + 1
                 while j < n:
                     s_line = lines[j]
-                    if s_line.strip().startswith('*'): break
+                    if s_line.strip().startswith(b'*'): break
                     buffer_block.append(s_line)
                     
-                    if not s_line.strip().startswith('$') and not is_target_sec:
-                        tokens = re.split(r'[,\s]+', s_line.strip())
+                    if not s_line.strip().startswith(b'$') and not is_target_sec:
+                        tokens = line_ints(j)
                         if tokens:
                             # SECID is usually the first token
-                            sid = safe_int(tokens[0])
+                            sid = tokens[0]
                             if sid is not None and sid in keep_sec_ids:
                                 is_target_sec = True
                     j += 1
                 
                 if is_target_sec:
-                    for b in buffer_block: out.write(b)
+                    buf.extend(buffer_block)
                 i = j
                 continue
 
             # 6. Handle MATERIALS (Filtered by ID)
-            elif line_strip.startswith('*MAT_'):
+            elif line_strip.startswith(b'*MAT_'):
                 # Buffer to check ID
                 buffer_block = [line]
                 is_target_mat = False
@@ -276,20 +422,20 @@ def extract_odd_components(input_file, output_file):
                 j = i + 1
                 while j < n:
                     m_line = lines[j]
-                    if m_line.strip().startswith('*'): break
+                    if m_line.strip().startswith(b'*'): break
                     buffer_block.append(m_line)
                     
-                    if not m_line.strip().startswith('$') and not is_target_mat:
-                        tokens = re.split(r'[,\s]+', m_line.strip())
+                    if not m_line.strip().startswith(b'$') and not is_target_mat:
+                        tokens = line_ints(j)
                         if tokens:
                             # MID is usually the first token
-                            mid = safe_int(tokens[0])
+                            mid = tokens[0]
                             if mid is not None and mid in keep_mat_ids:
                                 is_target_mat = True
                     j += 1
                 
                 if is_target_mat:
-                    for b in buffer_block: out.write(b)
+                    buf.extend(buffer_block)
                 i = j
                 continue
             
@@ -297,9 +443,20 @@ def extract_odd_components(input_file, output_file):
             else:
                 i += 1
 
-        out.write("*END\n")
+        buf.append(b"*END\n")
+        out.write(b''.join(buf))
     print(f"  [OK] Saved: {os.path.basename(output_file)}")
 
+def _process_one(path):
+    """Worker: extracts one file into OUTPUT_DIR."""
+    try:
+        fname = os.path.basename(path)
+        out_name = f"Odd_Comps_{fname}"
+        out_path = os.path.join(CONFIG["OUTPUT_DIR"], out_name)
+        extract_odd_components(path, out_path)
+    except Exception as e:
+        print(f"  [ERR] General Failure on {path}: {e}")
+
 def main():
     # Use raw string literals (r"") for Windows paths to avoid escape sequence issues
     if not os.path.exists(CONFIG["OUTPUT_DIR"]):
@@ -324,14 +481,9 @@ def main():
 
     print(f"--- Segregating Odd Components from {len(files)} files ---")
     
-    for f in files:
-        try:
-            fname = os.path.basename(f)
-            out_name = f"Odd_Comps_{fname}"
-            out_path = os.path.join(CONFIG["OUTPUT_DIR"], out_name)
-            extract_odd_components(f, out_path)
-        except Exception as e:
-            print(f"  [ERR] General Failure on {f}: {e}")
+    # Files are independent, so process them in parallel
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(files))) as ex:
+        list(ex.map(_process_one, files))
 
     print("\nExtraction Complete.")
 
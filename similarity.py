@@ -1,34 +1,50 @@
 import os
-import glob
 import math
+import fnmatch
 import re
+import pickle
+import hashlib
 import logging
+import functools
 from collections import defaultdict
 
+import numpy as np
+
 # Configure logging to show progress
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
+# Canonicalized decks are cached in this folder (next to each file) until the file changes.
+# Note: only the top-level file's modification time is checked, not its includes.
+CACHE_DIR_NAME = ".similarity_cache"
+# Bump when _canonicalize's output changes, to invalidate old cache entries
+PARSER_VERSION = 4
+
+# Synthetic keyword holding the mesh fingerprint (only with compare_mesh=True)
+MESH_KEYWORD = "*MESH_FINGERPRINT"
+
 try:
     # We use qd-cae because it handles includes and parses mesh data accurately
-    from qd.cae.dyna import KeyFile
+    from qd.cae.dyna import KeyFile, Element
 except ImportError:
     print("CRITICAL ERROR: The 'qd' library is missing.")
     print("Please install it by running: pip install qd")
     exit(1)
 
 class DynaSimilarityEngine:
-    def __init__(self, reference_file):
+    def __init__(self, reference_file, compare_mesh=False):
         """
         Initialize with the baseline design file (e.g., design_1.k).
+        compare_mesh: also parse nodes/elements and compare a fingerprint of the mesh.
+                      Off by default: the field comparison only needs keyword cards,
+                      and parsing the mesh is most of the load time.
         """
         self.ref_path = reference_file
+        self.compare_mesh = compare_mesh
         logging.info(f"LOADING REFERENCE: {os.path.basename(reference_file)}...")
         
         # load_includes=True ensures we compare the full assembly, not just the wrapper file.
-        # parse_mesh=True allows us to detect changes in node coordinates/element connectivity.
         try:
-            self.ref_kf = KeyFile(reference_file, load_includes=True, parse_mesh=True)
-            self.ref_data = self._canonicalize(self.ref_kf)
+            self.ref_data = self._load(reference_file)
             self.ref_keywords = set(self.ref_data.keys())
         except Exception as e:
             logging.error(f"Failed to load reference file: {e}")
@@ -36,10 +52,117 @@ class DynaSimilarityEngine:
         
         logging.info(f"Reference loaded. Found {len(self.ref_keywords)} unique keyword types.")
 
+    def _load(self, path):
+        """
+        Parses and canonicalizes a deck, reusing the on-disk cache when the file is unchanged.
+        """
+        key = f"{os.path.abspath(path)}:{os.path.getmtime(path)}:{PARSER_VERSION}:{self.compare_mesh}"
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+        cache_path = os.path.join(cache_dir, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".pkl")
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass # Not cached yet (or unreadable): parse it
+        
+        keyfile = KeyFile(path, load_includes=True, parse_mesh=self.compare_mesh)
+        data = self._canonicalize(keyfile)
+        if self.compare_mesh:
+            # Compared like any other keyword card
+            data[MESH_KEYWORD]["Global"] = self._pack_fields(self._mesh_fingerprint(keyfile))
+        
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logging.warning(f"Could not cache {os.path.basename(path)}: {e}")
+        return data
+
+    def _mesh_fingerprint(self, keyfile):
+        """
+        Summarizes the mesh as counts plus hashes of the sorted node IDs/coordinates
+        and element connectivity, so a changed mesh changes these few fields.
+        Uses qd's bulk array accessors, so no per-node/per-element Python objects are made.
+        """
+        node_ids = np.asarray(keyfile.get_node_ids(), dtype=np.int64)
+        coords = np.round(np.asarray(keyfile.get_node_coords(), dtype=np.float64).reshape(-1, 3), 6)
+        order = np.lexsort((coords[:, 2], coords[:, 1], coords[:, 0], node_ids))
+        node_hash = hashlib.blake2b(digest_size=16)
+        node_hash.update(node_ids[order].tobytes())
+        node_hash.update(coords[order].tobytes())
+        
+        n_elements = 0
+        elem_hash = hashlib.blake2b(digest_size=16)
+        # Connectivity width differs per element type, so each type is hashed as its own block
+        for etype, n_nodes in ((Element.beam, 2), (Element.shell, 4), (Element.solid, 8), (Element.tshell, 8)):
+            elem_ids = np.asarray(keyfile.get_element_ids(etype), dtype=np.int64)
+            if not len(elem_ids):
+                continue
+            conn = np.asarray(keyfile.get_element_node_ids(etype, n_nodes), dtype=np.int64).reshape(len(elem_ids), n_nodes)
+            order = np.lexsort((*conn.T[::-1], elem_ids)) # By ID, then connectivity
+            elem_hash.update(np.array((n_nodes, len(elem_ids)), dtype=np.int64).tobytes())
+            elem_hash.update(elem_ids[order].tobytes())
+            elem_hash.update(conn[order].tobytes())
+            n_elements += len(elem_ids)
+        
+        return {
+            'n_nodes': len(node_ids),
+            'n_elements': n_elements,
+            'node_hash': node_hash.hexdigest(),
+            'element_hash': elem_hash.hexdigest(),
+        }
+
+    @staticmethod
+    def _pack_fields(fields):
+        """
+        Splits a card's {Field_Name: Value} into (float_names, float_values, other_fields):
+        the float fields as a name tuple + float32 array (compared in one vectorized
+        call; float32 is ample for a 1e-5 relative tolerance and halves the bytes
+        scanned), everything else as a dict.
+        """
+        float_names = tuple(name for name, val in fields.items() if isinstance(val, float))
+        float_vals = np.array([fields[name] for name in float_names], dtype=np.float32)
+        other = {name: val for name, val in fields.items() if not isinstance(val, float)}
+        return float_names, float_vals, other
+
+    @staticmethod
+    def _fields_match(r_val, t_val):
+        """Scalar field rule: equal after normalization, or close floats."""
+        # Exact match check (using normalized values)
+        if r_val == t_val:
+            return True
+        # Fallback for close floats (physics tolerance)
+        return isinstance(r_val, float) and isinstance(t_val, float) and math.isclose(r_val, t_val, rel_tol=1e-5)
+
+    def _compare_cards(self, ref_card, tgt_card):
+        """Returns (fields compared, fields matching) for one pair of packed cards."""
+        r_names, r_vals, r_other = ref_card
+        t_names, t_vals, t_other = tgt_card
+        total = len(r_names) + len(r_other)
+        
+        if r_names == t_names and r_other.keys() == t_other.keys():
+            # Same card layout: compare all float fields at once (same rule as
+            # math.isclose, written as a subtraction so it stays in float32)
+            with np.errstate(invalid='ignore'): # inf - inf
+                close = (r_vals == t_vals) | (np.abs(r_vals - t_vals) <= 1e-5 * np.maximum(np.abs(r_vals), np.abs(t_vals)))
+            matches = int(np.count_nonzero(close))
+            matches += sum(1 for name, r_val in r_other.items() if r_val == t_other[name])
+            return total, matches
+        
+        # Different layouts: field by field
+        ref_vals = dict(zip(r_names, r_vals.tolist()), **r_other)
+        tgt_vals = dict(zip(t_names, t_vals.tolist()), **t_other)
+        matches = sum(1 for field, r_val in ref_vals.items() if self._fields_match(r_val, tgt_vals.get(field)))
+        return total, matches
+
     def _canonicalize(self, keyfile):
         """
         Converts the KeyFile object into a normalized dictionary for accurate comparison.
-        Structure: { Keyword_Name : { ID : { Field_Name : Value } } }
+        Structure: { Keyword_Name : { ID : packed fields (see _pack_fields) } }
         """
         data = defaultdict(dict)
         
@@ -74,7 +197,7 @@ class DynaSimilarityEngine:
                 fields[name] = val
             
             # Handle duplicate IDs (last one wins, consistent with LS-DYNA behavior)
-            data[kw_name][card_id] = fields
+            data[kw_name][card_id] = self._pack_fields(fields)
             
         return data
 
@@ -84,24 +207,25 @@ class DynaSimilarityEngine:
         """
         logging.info(f"  -> Comparing against: {os.path.basename(target_file)}")
         try:
-            tgt_kf = KeyFile(target_file, load_includes=True, parse_mesh=True)
-            tgt_data = self._canonicalize(tgt_kf)
+            tgt_data = self._load(target_file)
             tgt_keywords = set(tgt_data.keys())
         except Exception as e:
             logging.error(f"Failed to parse {target_file}: {e}")
             return 0.0
 
         # 1. Structural Similarity (Jaccard Index of Keywords)
-        intersection = self.ref_keywords.intersection(tgt_keywords)
-        union = self.ref_keywords.union(tgt_keywords)
-        struct_score = len(intersection) / len(union) if union else 0.0
+        # |A u B| = |A| + |B| - |A n B|, so the union is never built
+        inter = self.ref_keywords & tgt_keywords
+        n_inter = len(inter)
+        n_union = len(self.ref_keywords) + len(tgt_keywords) - n_inter
+        struct_score = n_inter / n_union if n_union else 0.0
 
         # 2. Parametric Similarity (Field-by-Field Check)
         total_fields = 0
         matching_fields = 0
 
         # Only compare keywords that exist in both files
-        for kw in intersection:
+        for kw in inter:
             ref_cards = self.ref_data[kw]
             tgt_cards = tgt_data[kw]
             
@@ -109,20 +233,9 @@ class DynaSimilarityEngine:
             common_ids = set(ref_cards.keys()).intersection(tgt_cards.keys())
             
             for cid in common_ids:
-                ref_vals = ref_cards[cid]
-                tgt_vals = tgt_cards[cid]
-                
-                for field, r_val in ref_vals.items():
-                    total_fields += 1
-                    t_val = tgt_vals.get(field)
-                    
-                    # Exact match check (using normalized values)
-                    if r_val == t_val:
-                        matching_fields += 1
-                    # Fallback for close floats (physics tolerance)
-                    elif isinstance(r_val, float) and isinstance(t_val, float):
-                        if math.isclose(r_val, t_val, rel_tol=1e-5):
-                            matching_fields += 1
+                total, matches = self._compare_cards(ref_cards[cid], tgt_cards[cid])
+                total_fields += total
+                matching_fields += matches
         
         param_score = matching_fields / total_fields if total_fields > 0 else 0.0
 
@@ -132,28 +245,45 @@ class DynaSimilarityEngine:
         
         return round(final_score * 100, 2)
 
+# Digit runs in a file name, compiled once
+_NAT_RE = re.compile(r'([0-9]+)')
+
+@functools.lru_cache(maxsize=None)
 def natural_sort_key(s):
     """
     Sorts strings with embedded numbers naturally (e.g. design_2 comes before design_10).
     """
-    return [int(text) if text.isdigit() else text.lower()
-            for text in re.split('([0-9]+)', s)]
+    return tuple(int(text) if text.isdigit() else text.lower()
+                 for text in _NAT_RE.split(s))
+
+def find_files(root, patterns):
+    """
+    Yields files under root (recursively) whose name matches any of the patterns,
+    in a single directory walk. Hidden entries are skipped, as glob does.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return # Unreadable folder: skip it, as glob does
+    for entry in entries:
+        if entry.name.startswith('.'):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from find_files(entry.path, patterns)
+        elif any(fnmatch.fnmatch(entry.name, pat) for pat in patterns):
+            yield entry.path
 
 def main():
     # SETTINGS: Current directory - NOTE: The path uses Windows backslashes,
     # which can sometimes cause issues. Using raw string (r"...") is safer.
     work_dir = r"E:\USERS\Gopi_AIML\Slate_Model_Files\KFiless" 
-    extensions = ['*.k', '*.dyn', '*.key']
+    patterns = ('design_*.k', 'design_*.dyn', 'design_*.key')
     
     # 1. Discover Files
-    files = [] # FIX 1: Initialize the list correctly
-    for ext in extensions:
-        # Recursive glob in case designs are in subfolders
-        # Looking for files named 'design_*.k' etc.
-        files.extend(glob.glob(os.path.join(work_dir, "**", f"design_{ext}"), recursive=True))
-    
-    # Deduplicate and Sort naturally so design_1 is the reference
-    files = sorted(list(set(files)), key=natural_sort_key)
+    # One recursive walk in case designs are in subfolders; each file is seen once
+    # Sort naturally so design_1 is the reference
+    files = sorted(find_files(work_dir, patterns), key=natural_sort_key)
     
     if len(files) < 2:
         print(f"Error: Found only {len(files)} files matching 'design_*' in {work_dir}. Need at least 2 to perform comparison.")
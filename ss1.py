@@ -9,9 +9,31 @@ FEA Comparator: All-Pairs Combination (N-to-N)
 
 import os
 import re
+import csv
+import sys
 import glob
-import itertools
-from multiprocessing import Pool, cpu_count
+import mmap
+import pickle
+import hashlib
+import functools
+from multiprocessing import Pool, cpu_count, current_process
+
+import numpy as np
+
+# Numba is optional: with it the deck is scanned as raw bytes by compiled code,
+# without it we fall back to the line-by-line Python parser.
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+# xxhash is optional: a fast 64-bit fingerprint of each file's parts, else blake2b
+try:
+    import xxhash
+    _fingerprint_hash = xxhash.xxh3_64
+except ImportError:
+    _fingerprint_hash = functools.partial(hashlib.blake2b, digest_size=8)
 
 # -------------------------
 # Configuration
@@ -24,17 +46,28 @@ CONFIG = {
     "FILE_PATTERN": "Design_*.dyn",
     
     # Tolerance for reporting differences
-    "TOLERANCE": 0.001  
+    "TOLERANCE": 0.001,
+    
+    # Parsed files are cached here and reused until the file changes
+    "CACHE_DIR": "E:\\USERS\\Gopi_AIML\\Slate_Model_Files\\KFiless_out\\.parse_cache"
 }
 
+# Bump when parse_deep_search's output changes, to invalidate old cache entries
+PARSER_VERSION = 4
+
+# Field separator (commas and/or whitespace), compiled once
+_TOK_SPLIT = re.compile(rb'[,\s]+').split
+
 def safe_float(s):
     try: return float(s)
     except: return 0.0
 
 def get_numeric_line(line):
-    """Returns a list of integers if line contains PID/SECID pattern."""
-    if '$' in line: line = line.split('$')[0]
-    tokens = re.split(r'[,\s]+', line.strip())
+    """Returns a list of integers if line (bytes) contains PID/SECID pattern."""
+    # Cheap reject before tokenizing: the line must start with a digit or separator
+    if not line or line[0] not in b'0123456789 \t,': return None
+    if b'$' in line: line = line.split(b'$', 1)[0]
+    tokens = _TOK_SPLIT(line.strip())
     tokens = [t for t in tokens if t]
     
     if len(tokens) >= 2:
@@ -42,106 +75,382 @@ def get_numeric_line(line):
             return int(tokens[0]), int(tokens[1])
     return None
 
-def parse_deep_search(filepath):
-    """
-    Robust Parser: Scans for *PART and *SECTION to map PID -> Thickness.
-    """
-    data = {
-        "parts": {},      # {pid: {'name': str, 'secid': int, 'value': 0.0}}
-        "sections": {}    # {secid: value}
-    }
+# -------------------------
+# Compiled Scanner
+# -------------------------
+if HAVE_NUMBA:
+    # Keyword prefixes (compared case-insensitively)
+    _KW_PART = np.frombuffer(b"*PART", np.uint8)
+    _KW_SECTION_SHELL = np.frombuffer(b"*SECTION_SHELL", np.uint8)
+    _KW_SECTION_BEAM = np.frombuffer(b"*SECTION_BEAM", np.uint8)
     
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        lines = f.readlines()
-
-    n = len(lines)
+    # Powers of ten that are exact as float64
+    _POW10 = np.array([10.0 ** k for k in range(23)])
+    
+    # Byte classes (one bit each) in a 256-entry lookup table, so classifying
+    # a byte is a single load instead of a chain of comparisons
+    _DIGIT, _WS, _SEP = 1, 2, 4
+    _CLASS = np.zeros(256, np.uint8)
+    _CLASS[ord('0'):ord('9') + 1] |= _DIGIT
+    for _c in b" \t\n\v\f\r":
+        _CLASS[_c] |= _WS | _SEP
+    _CLASS[ord(',')] |= _SEP
     
-    for i, line in enumerate(lines):
-        line_strip = line.strip()
-        if not line_strip or line_strip.startswith('$'): continue
+    # Upper-case mapping for keyword matching
+    _UPPER = np.arange(256, dtype=np.uint8)
+    _UPPER[ord('a'):ord('z') + 1] -= 32
+
+    @njit(cache=True)
+    def _is_ws(c):
+        return (_CLASS[c] & _WS) != 0
+
+    @njit(cache=True)
+    def _is_sep(c):
+        return (_CLASS[c] & _SEP) != 0
+
+    @njit(cache=True)
+    def _is_digit(c):
+        return (_CLASS[c] & _DIGIT) != 0
+
+    @njit(cache=True)
+    def _starts_with(buf, a, b, kw):
+        """Case-insensitive: does buf[a:b] start with kw (upper case)?"""
+        if b - a < kw.size: return False
+        for k in range(kw.size):
+            if _UPPER[buf[a + k]] != kw[k]: return False
+        return True
+
+    @njit(cache=True)
+    def _token_end(buf, a, b):
+        """End of the token starting at a (first ',' or whitespace)."""
+        while a < b and not _is_sep(buf[a]): a += 1
+        return a
+
+    @njit(cache=True)
+    def _parse_digits(buf, a, b):
+        """int() of buf[a:b], or -1 if it is not all digits (str.isdigit)."""
+        if a == b: return -1
+        # Branchless: accumulate every byte, AND the digit bits, check once at the end
+        ok = _DIGIT
+        v = 0
+        for k in range(a, b):
+            c = buf[k]
+            ok &= _CLASS[c]
+            v = v * 10 + (c - 48)
+        return v if ok else -1
+
+    @njit(cache=True)
+    def _parse_float(buf, a, b):
+        """float() of buf[a:b], or 0.0 if it is not a number (like safe_float)."""
+        i = a
+        neg = False
+        if i < b and (buf[i] == 43 or buf[i] == 45): # '+' / '-'
+            neg = buf[i] == 45
+            i += 1
         
-        if line_strip.startswith('*'):
-            keyword = line_strip.split()[0].upper()
+        mant = 0
+        n_digits = 0
+        frac_digits = 0
+        seen_dot = False
+        while i < b:
+            c = buf[i]
+            if _is_digit(c):
+                if n_digits < 18:
+                    mant = mant * 10 + (c - 48)
+                    if seen_dot: frac_digits += 1
+                elif not seen_dot:
+                    frac_digits -= 1 # Beyond int64 precision: keep the magnitude
+                n_digits += 1
+            elif c == 46 and not seen_dot:
+                seen_dot = True
+            else:
+                break
+            i += 1
+        if n_digits == 0: return 0.0
+        
+        exp = 0
+        if i < b:
+            if buf[i] != 101 and buf[i] != 69: return 0.0 # 'e' / 'E'
+            i += 1
+            exp_neg = False
+            if i < b and (buf[i] == 43 or buf[i] == 45):
+                exp_neg = buf[i] == 45
+                i += 1
+            if i == b: return 0.0
+            while i < b:
+                c = buf[i]
+                if not _is_digit(c): return 0.0
+                exp = exp * 10 + (c - 48)
+                i += 1
+            if exp_neg: exp = -exp
+        
+        # One multiply/divide by an exact power of ten (correctly rounded for
+        # the usual case of <= 15 significant digits)
+        exp -= frac_digits
+        v = float(mant)
+        while exp > 22:
+            v *= 1e22
+            exp -= 22
+        while exp < -22:
+            v /= 1e22
+            exp += 22
+        if exp >= 0:
+            v *= _POW10[exp]
+        else:
+            v /= _POW10[-exp]
+        return -v if neg else v
+
+    @njit(cache=True)
+    def _numeric_pair(buf, a, b):
+        """Compiled get_numeric_line: (pid, secid) if the first two tokens are integers, else (-1, -1)."""
+        # Drop a trailing $ comment
+        for k in range(a, b):
+            if buf[k] == 36:
+                b = k
+                break
+        while a < b and _is_sep(buf[a]): a += 1
+        e1 = _token_end(buf, a, b)
+        c = e1
+        while c < b and _is_sep(buf[c]): c += 1
+        e2 = _token_end(buf, c, b)
+        v1 = _parse_digits(buf, a, e1)
+        v2 = _parse_digits(buf, c, e2)
+        if v1 < 0 or v2 < 0: return -1, -1
+        return v1, v2
+
+    @njit(cache=True)
+    def _scan(buf):
+        """
+        Single pass over the deck bytes doing what parse_deep_search does line by line.
+        Returns (parts, sec_ids, sec_vals):
+          parts: (pid, secid, name_start, name_end) rows, name span -1 if unknown
+          sec_ids, sec_vals: section ID and thickness of every section found
+        """
+        n = buf.size
+        
+        # Stripped bounds of every line
+        n_lines = 1
+        for k in range(n):
+            if buf[k] == 10: n_lines += 1
+        ls = np.empty(n_lines, np.int64)
+        le = np.empty(n_lines, np.int64)
+        n_kw = 0
+        pos = 0
+        for li in range(n_lines):
+            end = pos
+            while end < n and buf[end] != 10: end += 1
+            a = pos
+            b = end
+            while a < b and _is_ws(buf[a]): a += 1
+            while b > a and _is_ws(buf[b - 1]): b -= 1
+            ls[li] = a
+            le[li] = b
+            if a < b and buf[a] == 42: n_kw += 1
+            pos = end + 1
+        
+        # At most one part/section per keyword line
+        parts = np.empty((n_kw, 4), np.int64)
+        sec_ids = np.empty(n_kw, np.int64)
+        sec_vals = np.empty(n_kw, np.float64)
+        n_parts = 0
+        n_secs = 0
+        
+        for i in range(n_lines):
+            a = ls[i]
+            b = le[i]
+            if a == b or buf[a] != 42: continue
             
             # --- PARSE PART ---
-            if keyword.startswith('*PART'):
-                found_pid = None
-                found_secid = None
-                part_name = "Unknown"
-
-                # Look ahead 4 lines for ID pattern
-                for offset in range(1, 5):
-                    if i + offset >= n: break
-                    look_line = lines[i+offset].strip()
+            if _starts_with(buf, a, b, _KW_PART):
+                name_a = -1
+                name_b = -1
+                for off in range(1, 5):
+                    j = i + off
+                    if j >= n_lines: break
+                    ja = ls[j]
+                    jb = le[j]
+                    if ja < jb and buf[ja] == 42: break
+                    if ja < jb and buf[ja] == 36: continue
                     
-                    if look_line.startswith('*'): break
-                    if look_line.startswith('$'): continue
-                    
-                    ids = get_numeric_line(look_line)
-                    if ids:
-                        found_pid, found_secid = ids
-                        if offset > 1:
-                            prev_line = lines[i+offset-1].strip()
-                            if not prev_line.startswith('$'):
-                                part_name = prev_line
+                    pid, secid = _numeric_pair(buf, ja, jb)
+                    if pid >= 0:
+                        if off > 1:
+                            pa = ls[j - 1]
+                            pb = le[j - 1]
+                            if not (pa < pb and buf[pa] == 36):
+                                name_a = pa
+                                name_b = pb
+                        parts[n_parts, 0] = pid
+                        parts[n_parts, 1] = secid
+                        parts[n_parts, 2] = name_a
+                        parts[n_parts, 3] = name_b
+                        n_parts += 1
                         break
-                    elif offset == 1:
-                        part_name = look_line
-
-                if found_pid is not None:
-                    data["parts"][found_pid] = {'name': part_name, 'secid': found_secid, 'value': 0.0}
-
-            # --- PARSE SHELL SECTION ---
-            elif keyword.startswith('*SECTION_SHELL'):
-                for offset in range(1, 5):
-                    if i + offset >= n: break
-                    l = lines[i+offset].strip()
-                    if l.startswith('*'): break
-                    if l.startswith('$'): continue
+                    elif off == 1:
+                        name_a = ja
+                        name_b = jb
+            
+            # --- PARSE SHELL / BEAM SECTION ---
+            elif _starts_with(buf, a, b, _KW_SECTION_SHELL) or _starts_with(buf, a, b, _KW_SECTION_BEAM):
+                for off in range(1, 5):
+                    j = i + off
+                    if j >= n_lines: break
+                    ja = ls[j]
+                    jb = le[j]
+                    if ja < jb and buf[ja] == 42: break
+                    if ja < jb and buf[ja] == 36: continue
                     
-                    tokens = re.split(r'[,\s]+', l)
-                    if tokens and tokens[0].isdigit():
-                        secid = int(tokens[0])
+                    secid = _parse_digits(buf, ja, _token_end(buf, ja, jb))
+                    if secid >= 0:
                         # Look for next data line (Thickness)
-                        next_data_idx = i + offset + 1
-                        while next_data_idx < n:
-                            nl = lines[next_data_idx].strip()
-                            if nl.startswith('*'): break
-                            if not nl or nl.startswith('$'): 
-                                next_data_idx += 1
+                        k = j + 1
+                        while k < n_lines:
+                            ka = ls[k]
+                            kb = le[k]
+                            if ka < kb and buf[ka] == 42: break
+                            if ka == kb or buf[ka] == 36:
+                                k += 1
                                 continue
-                            
-                            tok2 = re.split(r'[,\s]+', nl)
-                            if tok2:
-                                val = safe_float(tok2[0])
-                                data["sections"][secid] = val
+                            sec_ids[n_secs] = secid
+                            sec_vals[n_secs] = _parse_float(buf, ka, _token_end(buf, ka, kb))
+                            n_secs += 1
                             break
                         break
+        
+        return parts[:n_parts], sec_ids[:n_secs], sec_vals[:n_secs]
 
-            # --- PARSE BEAM SECTION ---
-            elif keyword.startswith('*SECTION_BEAM'):
-                for offset in range(1, 5):
-                    if i + offset >= n: break
-                    l = lines[i+offset].strip()
-                    if l.startswith('*'): break
-                    if l.startswith('$'): continue
-                    
-                    tokens = re.split(r'[,\s]+', l)
-                    if tokens and tokens[0].isdigit():
-                        secid = int(tokens[0])
-                        next_data_idx = i + offset + 1
-                        while next_data_idx < n:
-                            nl = lines[next_data_idx].strip()
-                            if nl.startswith('*'): break
-                            if not nl or nl.startswith('$'): 
-                                next_data_idx += 1
-                                continue
-                            tok2 = re.split(r'[,\s]+', nl)
-                            if tok2:
-                                val = safe_float(tok2[0])
-                                data["sections"][secid] = val
-                            break
-                        break
+def _to_soa(parts, with_names):
+    """
+    Converts {pid: {'name', 'secid', 'value'}} to parallel arrays sorted by PID:
+    {"pids": int64[], "secids": int64[], "values": float64[], "fp": str} (+ "names": [str] if with_names).
+    "fp" fingerprints pids + values: files with equal fingerprints compare as identical.
+    """
+    pids = sorted(parts)
+    data = {
+        "pids":   np.array(pids, dtype=np.int64),
+        "secids": np.array([parts[pid]['secid'] for pid in pids], dtype=np.int64),
+        "values": np.array([parts[pid]['value'] for pid in pids], dtype=np.float64),
+    }
+    h = _fingerprint_hash()
+    h.update(data["pids"].tobytes())
+    h.update(data["values"].tobytes())
+    data["fp"] = h.hexdigest()
+    if with_names:
+        # The same part names repeat across designs: share one string object each
+        data["names"] = [sys.intern(parts[pid]['name']) for pid in pids]
+    return data
+
+def _map_file(f):
+    """Read-only mmap of an open file, or b'' for an empty one (which mmap refuses)."""
+    if os.fstat(f.fileno()).st_size == 0: return b''
+    if hasattr(os, "posix_fadvise"):
+        # Let the kernel read ahead of the parser instead of faulting pages in one by one.
+        # These are separate advice values, not flags, so they are given one at a time.
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _parse_deep_search_numba(filepath, with_names):
+    """parse_deep_search using the compiled scanner."""
+    data = {"parts": {}, "sections": {}}
+    with open(filepath, 'rb') as f:
+        mm = _map_file(f)
+        # The scanner reads the mapped pages directly; the array must be gone before mm is closed
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        parts, sec_ids, sec_vals = _scan(buf)
+        for pid, sid, name_a, name_b in parts.tolist():
+            name = "Unknown"
+            if with_names and name_a >= 0:
+                name = mm[name_a:name_b].decode('utf-8', errors='ignore').strip()
+            data["parts"][pid] = {'name': name, 'secid': sid, 'value': 0.0}
+        del buf
+        if mm: mm.close()
+    
+    for sid, val in zip(sec_ids.tolist(), sec_vals.tolist()):
+        data["sections"][sid] = val
+    
+    # Link Sections to Parts
+    for pid, p in data["parts"].items():
+        sid = p['secid']
+        if sid in data["sections"]:
+            p['value'] = data["sections"][sid]
+    
+    return _to_soa(data["parts"], with_names)
+
+def parse_deep_search(filepath, with_names=False):
+    """
+    Robust Parser: Scans for *PART and *SECTION to map PID -> Thickness.
+    Returns the parts as arrays sorted by PID (see _to_soa). Part names are
+    only collected with with_names=True, since they are only needed for reports.
+    """
+    if HAVE_NUMBA:
+        return _parse_deep_search_numba(filepath, with_names)
+    
+    data = {
+        "parts": {},      # {pid: {'name': str, 'secid': int, 'value': 0.0}}
+        "sections": {}    # {secid: value}
+    }
+    
+    # Lines stay bytes: only the tokens that are converted (and part names) are ever decoded
+    with open(filepath, 'rb') as f:
+        mm = _map_file(f)
+        # mmap has no split(): readline() walks the mapping without copying the whole file first
+        lines = list(iter(mm.readline, b'')) if mm else []
+        if mm: mm.close()
+
+    n = len(lines)
+    stripped = [line.strip() for line in lines]
+    
+    # next_sig[i]: index of the first significant (non-blank, non-$) line after i, or n.
+    # One reverse pass replaces the per-keyword look-ahead loops that re-strip lines.
+    next_sig = [n] * n
+    nxt = n
+    for k in range(n - 1, -1, -1):
+        next_sig[k] = nxt
+        if stripped[k] and not stripped[k].startswith(b'$'): nxt = k
+    
+    for i, line_strip in enumerate(stripped):
+        if not line_strip.startswith(b'*'): continue
+        keyword = line_strip.split()[0].upper()
+        
+        # --- PARSE PART ---
+        if keyword.startswith(b'*PART'):
+            found_pid = None
+            found_secid = None
+            part_name = b"Unknown"
+
+            # Look ahead 4 lines for ID pattern
+            j = next_sig[i]
+            while j <= i + 4 and j < n and not stripped[j].startswith(b'*'):
+                ids = get_numeric_line(stripped[j])
+                if ids:
+                    found_pid, found_secid = ids
+                    if j > i + 1:
+                        # Title is the line above the IDs, or else the first line after *PART
+                        prev_line = stripped[j-1]
+                        if not prev_line.startswith(b'$'):
+                            part_name = prev_line
+                        elif not stripped[i+1].startswith(b'$'):
+                            part_name = stripped[i+1]
+                    break
+                j = next_sig[j]
+
+            if found_pid is not None:
+                data["parts"][found_pid] = {'name': part_name.decode('utf-8', errors='ignore'), 'secid': found_secid, 'value': 0.0}
+
+        # --- PARSE SHELL / BEAM SECTION ---
+        elif keyword.startswith(b'*SECTION_SHELL') or keyword.startswith(b'*SECTION_BEAM'):
+            j = next_sig[i]
+            while j <= i + 4 and j < n and not stripped[j].startswith(b'*'):
+                tokens = _TOK_SPLIT(stripped[j])
+                if tokens[0].isdigit():
+                    secid = int(tokens[0])
+                    # Next data line (Thickness)
+                    k = next_sig[j]
+                    if k < n and not stripped[k].startswith(b'*'):
+                        data["sections"][secid] = safe_float(_TOK_SPLIT(stripped[k])[0])
+                    break
+                j = next_sig[j]
 
     # Link Sections to Parts
     for pid, p in data["parts"].items():
@@ -149,15 +458,85 @@ def parse_deep_search(filepath):
         if sid in data["sections"]:
             p['value'] = data["sections"][sid]
             
+    return _to_soa(data["parts"], with_names)
+
+def cached_parse(fpath):
+    """
+    parse_deep_search with an on-disk cache keyed by path + modification time,
+    so re-runs only parse new or changed files.
+    """
+    key = f"{os.path.abspath(fpath)}:{os.path.getmtime(fpath)}:{PARSER_VERSION}"
+    cache_path = os.path.join(CONFIG["CACHE_DIR"], hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".pkl")
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass # Not cached yet (or unreadable): parse it
+    
+    data = parse_deep_search(fpath)
+    
+    # Write to a temp file first so a parallel worker never reads half a pickle
+    try:
+        os.makedirs(CONFIG["CACHE_DIR"], exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Could not cache {fpath}: {e}")
     return data
 
 def worker(fpath):
     try:
-        return (fpath, parse_deep_search(fpath))
+        return (fpath, cached_parse(fpath))
     except Exception as e:
         print(f"Error parsing {fpath}: {e}")
         return (fpath, None)
 
+def _init_parse():
+    """Pins each parse worker to its own CPU (Linux only), so a file's pages stay in one core's cache."""
+    if not hasattr(os, "sched_setaffinity"): return
+    cpus = sorted(os.sched_getaffinity(0))
+    ident = current_process()._identity # (worker number,) inside a Pool
+    if ident:
+        os.sched_setaffinity(0, {cpus[(ident[0] - 1) % len(cpus)]})
+
+def build_matrix(all_files, results):
+    """
+    Stacks every file's values into one matrix V[file, part] over the union of
+    PIDs, NaN where a file has no such part (or failed to parse). Returns (all_pids, V).
+    """
+    all_pids = np.unique(np.concatenate([d["pids"] for d in results.values()] or [np.empty(0, np.int64)]))
+    V = np.full((len(all_files), len(all_pids)), np.nan)
+    for i, fpath in enumerate(all_files):
+        data = results.get(fpath)
+        if data is not None:
+            V[i, np.searchsorted(all_pids, data["pids"])] = data["values"]
+    return all_pids, V
+
+def changed_mask(va, vb):
+    """True where values differ beyond TOLERANCE. NaN (part missing on one side) never counts as changed."""
+    return (np.abs(va - vb) > CONFIG["TOLERANCE"]) & ((va > 0) | (vb > 0))
+
+def pairs_with_changes(V, max_cells=1 << 26):
+    """
+    has_diff[i, j] is True if files i and j differ on any shared PID.
+    All pairs are checked by broadcasting, a block of rows at a time to bound memory.
+    """
+    n, m = V.shape
+    has_diff = np.zeros((n, n), dtype=bool)
+    step = max(1, max_cells // max(1, n * m))
+    for i0 in range(0, n, step):
+        has_diff[i0:i0+step] = changed_mask(V[i0:i0+step, None, :], V[None, :, :]).any(-1)
+    return has_diff
+
+@functools.lru_cache(maxsize=None)
+def part_names(fpath):
+    """{pid: name} of one file, parsed on demand when a change in it is reported."""
+    data = parse_deep_search(fpath, with_names=True)
+    return dict(zip(data["pids"].tolist(), data["names"]))
+
 def main():
     if not os.path.exists(CONFIG["OUTPUT_DIR"]): os.makedirs(CONFIG["OUTPUT_DIR"])
     
@@ -172,63 +551,66 @@ def main():
 
     # 2. Parse ALL files first (Parallel)
     print(f"--- Parsing {num_files} Files ---")
-    with Pool(cpu_count()) as p:
-        results = dict(p.map(worker, all_files))
+    # Small chunks keep every core busy until the last file; failed files are left out
+    results = {}
+    with Pool(cpu_count(), initializer=_init_parse) as p:
+        for fpath, data in p.imap_unordered(worker, all_files, chunksize=4):
+            if data is not None:
+                results[fpath] = data
 
-    # 3. Generate Max Combinations (nC2)
-    # itertools.combinations('ABCD', 2) --> AB AC AD BC BD CD
-    file_combinations = list(itertools.combinations(all_files, 2))
-    print(f"--- Generated {len(file_combinations)} unique comparison pairs ---")
+    # 3. Max Combinations (nC2): every unique pair is compared in step 4
+    num_pairs = num_files * (num_files - 1) // 2
+    print(f"--- Generated {num_pairs} unique comparison pairs ---")
 
-    # 4. Run Comparisons
+    # 4. Run Comparisons (all pairs at once on the stacked matrix; only changed pairs are reported)
     print("\n--- PROCESSING COMBINATIONS ---")
     
     diff_count = 0
     
-    for file_a, file_b in file_combinations:
+    # Files with the same fingerprint can't differ from each other, so the matrix
+    # only gets one row per distinct fingerprint (failed files share the None row)
+    fps = [results[f]["fp"] if f in results else None for f in all_files]
+    first = {}
+    for fpath, fp in zip(all_files, fps):
+        first.setdefault(fp, fpath)
+    row_of = {fp: r for r, fp in enumerate(first)}
+    rows = np.array([row_of[fp] for fp in fps], dtype=np.intp)
+    
+    all_pids, V = build_matrix(list(first.values()), results)
+    has_diff = pairs_with_changes(V)[np.ix_(rows, rows)]
+    
+    # Upper triangle in row-major order: AB AC AD BC BD CD
+    for i, j in zip(*np.nonzero(np.triu(has_diff, 1))):
+        file_a, file_b = all_files[i], all_files[j]
+        va, vb = V[rows[i]], V[rows[j]]
         name_a = os.path.basename(file_a)
         name_b = os.path.basename(file_b)
+        names = part_names(file_a)
+        changes = [
+            (int(all_pids[c]), names.get(int(all_pids[c]), "Unknown"), float(va[c]), float(vb[c]))
+            for c in np.flatnonzero(changed_mask(va, vb))
+        ]
         
-        data_a = results.get(file_a)
-        data_b = results.get(file_b)
-        
-        if not data_a or not data_b: continue
-        
-        # Find Changes
-        changes = []
-        common_pids = set(data_a["parts"].keys()) & set(data_b["parts"].keys())
-        
-        for pid in common_pids:
-            val_a = data_a["parts"][pid]['value']
-            val_b = data_b["parts"][pid]['value']
-            
-            if abs(val_a - val_b) > CONFIG["TOLERANCE"]:
-                if val_a > 0 or val_b > 0:
-                    part_name = data_a["parts"][pid]['name']
-                    changes.append((pid, part_name, val_a, val_b))
-        
-        # Report if changes found
-        if changes:
-            diff_count += 1
-            print(f"\n[!] CHANGE DETECTED: {name_a} vs {name_b}")
-            print(f"    {'PID':<10} {'Val_A':<8} {'Val_B':<8} {'Delta':<8} {'Name'}")
-            print(f"    {'-'*60}")
-            
-            for pid, name, va, vb in changes:
-                delta = vb - va
-                print(f"    {pid:<10} {va:<8.3f} {vb:<8.3f} {delta:<8.3f} {name[:30]}")
-            
-            # Save Pairwise Report
-            out_name = f"Diff_{name_a}_VS_{name_b}.csv"
-            out_path = os.path.join(CONFIG["OUTPUT_DIR"], out_name)
-            with open(out_path, 'w') as f:
-                f.write(f"Comparison,{name_a},{name_b}\n")
-                f.write("PID,PartName,Value_A,Value_B,Delta\n")
-                for pid, name, va, vb in changes:
-                    f.write(f"{pid},{name},{va},{vb},{vb-va}\n")
+        diff_count += 1
+        print(f"\n[!] CHANGE DETECTED: {name_a} vs {name_b}")
+        print(f"    {'PID':<10} {'Val_A':<8} {'Val_B':<8} {'Delta':<8} {'Name'}")
+        print(f"    {'-'*60}")
+    
+        for pid, name, va, vb in changes:
+            delta = vb - va
+            print(f"    {pid:<10} {va:<8.3f} {vb:<8.3f} {delta:<8.3f} {name[:30]}")
+    
+        # Save Pairwise Report
+        out_name = f"Diff_{name_a}_VS_{name_b}.csv"
+        out_path = os.path.join(CONFIG["OUTPUT_DIR"], out_name)
+        with open(out_path, 'w', newline='', buffering=1 << 20) as f:
+            w = csv.writer(f)
+            w.writerow(["Comparison", name_a, name_b])
+            w.writerow(["PID", "PartName", "Value_A", "Value_B", "Delta"])
+            w.writerows([(pid, name, va, vb, vb - va) for pid, name, va, vb in changes])
     
     print("\n" + "="*40)
-    print(f"Done. Found differences in {diff_count} of {len(file_combinations)} pairs.")
+    print(f"Done. Found differences in {diff_count} of {num_pairs} pairs.")
     print("="*40)
 
 if __name__ == "__main__":
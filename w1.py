@@ -13,12 +13,15 @@ import sys
 import os
 import subprocess
 import time
+import json
 import logging
-import random
 import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from multiprocessing import freeze_support
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import ctypes
 from ctypes import windll, c_int, byref, Structure, POINTER, pointer
 
@@ -52,15 +55,31 @@ import yfinance as yf
 import pyqtgraph as pg
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QTabWidget, QLabel, QGridLayout, 
-                             QFrame, QPushButton, QSizePolicy, QGraphicsOpacityEffect)
+                             QFrame, QPushButton, QSizePolicy, QGraphicsOpacityEffect,
+                             QGraphicsItem)
 # CRITICAL FIX: Importing QEasingCurve explicitly prevents the "Qt" error
-from PyQt6.QtCore import Qt, pyqtSignal, QThread, QSettings, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QColor, QPainter, QBrush, QLinearGradient
+from PyQt6.QtCore import Qt, pyqtSignal, QThread, QSettings, QTimer, QPropertyAnimation, QEasingCurve, QLineF, QRectF
+from PyQt6.QtGui import QColor, QPainter, QBrush, QLinearGradient, QPalette
+try:
+    from PyQt6 import sip
+except ImportError:
+    sip = None
+# sip.array (newer PyQt6) lets numpy write straight into a QLineF array
+HAVE_SIP_ARRAY = hasattr(sip, 'array')
+# Numba is optional: it fuses the engine tick into one compiled loop (NumPy otherwise)
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
 
 # --- CRITICAL FIX 1: DISABLE OPENGL ---
 # This prevents the "Scribble/Spaghetti" lines seen in Image 1
 pg.setConfigOptions(antialias=True) 
 # pg.setConfigOptions(useOpenGL=True) <--- DELETED THIS LINE
+# OpenGL stays off, so the CPU path has to be fast: with Numba installed, pyqtgraph
+# builds the curve paths (arrayToQPath) in compiled code
+if HAVE_NUMBA: pg.setConfigOptions(useNumba=True)
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -69,6 +88,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 cache_dir = os.path.join(os.getcwd(), "yfinance_cache")
 if not os.path.exists(cache_dir): os.makedirs(cache_dir, exist_ok=True)
 yf.set_tz_cache_location(cache_dir)
+# Last bar (timestamp, close) per ticker, so the next launch starts from real prices
+LATEST_CACHE = os.path.join(cache_dir, "latest.npz")
 
 # -----------------------------------------------------------------------------
 # 3. CONFIGURATION & THEMES
@@ -83,16 +104,69 @@ class Theme:
     up: str
     down: str
     glass: str
+    
+    # Derived once per theme (see __post_init__), so updates only look these up
+    pen_up: object = field(init=False, repr=False, compare=False)
+    pen_down: object = field(init=False, repr=False, compare=False)
+    brush_up: object = field(init=False, repr=False, compare=False)
+    brush_down: object = field(init=False, repr=False, compare=False)
+    color_up: object = field(init=False, repr=False, compare=False)
+    color_down: object = field(init=False, repr=False, compare=False)
+    qss: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.pen_up = pg.mkPen(self.up, width=2)
+        self.pen_down = pg.mkPen(self.down, width=2)
+        self.brush_up = pg.mkBrush(QColor(self.up + "20"))
+        self.brush_down = pg.mkBrush(QColor(self.down + "20"))
+        self.color_up = QColor(self.up)
+        self.color_down = QColor(self.down)
+        
+        # This theme's part of the app-level style sheet (APP_QSS): every rule is scoped
+        # to the main window's "appTheme" property, so switching themes is one re-polish
+        w = f'TerminalWindow[appTheme="{self.name.lower()}"]'
+        self.qss = f"""
+            {w} QFrame#title_bar, {w} QFrame#title_bar * {{
+                background: {self.bg}dd; border-bottom: 1px solid {self.border};
+            }}
+            {w} QLabel#title {{ color: {self.up}; border: none; }}
+            {w} QPushButton#theme_btn {{ color: {self.fg}; background: transparent; border: none; }}
+            {w} QTabWidget::pane {{ border: none; background: transparent; }}
+            {w} QTabBar::tab {{ 
+                background: {self.panel}; color: {self.fg}; 
+                padding: 10px 20px; border-top-left-radius: 6px; border-top-right-radius: 6px;
+                margin-right: 2px;
+            }}
+            {w} QTabBar::tab:selected {{ background: {self.up}; color: black; font-weight: bold; }}
+            {w} SmartTile[trend="up"], {w} SmartTile[trend="down"] {{
+                background: {self.panel}aa;
+                border: 1px solid {self.border};
+                border-radius: 6px;
+            }}
+            {w} SmartTile[trend="up"]:hover {{ border: 1px solid {self.up}; background: {self.panel}; }}
+            {w} SmartTile[trend="down"]:hover {{ border: 1px solid {self.down}; background: {self.panel}; }}
+            {w} SmartTile QLabel#price[loading="true"] {{ color: {self.fg}; font-size: 11pt; }}
+        """
 
 THEMES = {
     "DARK": Theme("Dark", "#050505", "#FFFFFF", "#111111", "#333333", "#00FF7F", "#FF4444", "CC050505"),
     "LIGHT": Theme("Light", "#F0F2F5", "#000000", "#FFFFFF", "#CCCCCC", "#00AA00", "#CC0000", "CCFFFFFF")
 }
 
+# Installed once on the QApplication; once loaded, the price color comes from the palette
+APP_QSS = 'SmartTile QLabel#price { font-weight: bold; }' + "".join(t.qss for t in THEMES.values())
+
 @dataclass
 class AppConfig:
     APP_NAME: str = "QUANTUM TERMINAL v2.4"
     REFRESH_RATE_MS: int = 150 
+    UI_FPS: int = 30 # Max tile repaint rate (engine ticks are coalesced to this)
+    RSI_PERIOD: int = 14 # Wilder smoothing period
+    HISTORY_LEN: int = 60 # Ticks kept per sparkline
+    SPARK_URL: str = "https://query1.finance.yahoo.com/v8/finance/spark"
+    SPARK_BATCH: int = 20 # Symbols per spark request (Yahoo's limit)
+    FETCH_WORKERS: int = 4
+    HISTORY_WORKERS: int = 8 # Per-symbol history requests in the fallback path
     
     WATCHLISTS = {
         "NIFTY 50": ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "INFY.NS", "ITC.NS", "SBIN.NS", "LT.NS", "BHARTIARTL.NS", "TITAN.NS", "ASIANPAINT.NS"],
@@ -135,89 +209,274 @@ class WindowEffect:
 # -----------------------------------------------------------------------------
 # 5. DATA ENGINE (BACKEND)
 # -----------------------------------------------------------------------------
+def _step_numpy(prices, targets, init_mask, hist_buf, head, avg_gain, avg_loss, noise, period, out_prices, out_chg, out_rsi):
+    """
+    One engine tick for all tickers, in place: moves prices (drift toward the target
+    plus noise; a gentle wiggle before real data), writes them into hist_buf[:, head],
+    updates the Wilder RSI averages and fills out_prices / out_chg / out_rsi.
+    """
+    drift = (targets - prices) * 0.1 * init_mask
+    new_prices = prices + drift + noise * np.where(init_mask, prices * 0.00015, 0.5)
+    delta = new_prices - prices
+    avg_gain[:] = (avg_gain * (period - 1) + np.maximum(delta, 0.0)) / period
+    avg_loss[:] = (avg_loss * (period - 1) + np.maximum(-delta, 0.0)) / period
+    
+    prices[:] = new_prices
+    hist_buf[:, head] = new_prices
+    first = hist_buf[:, (head + 1) % hist_buf.shape[1]] # Oldest tick
+    out_prices[:] = new_prices
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out_rsi[:] = np.where(avg_loss != 0, 100 - (100/(1 + avg_gain/avg_loss)), 50)
+        out_chg[:] = np.where(first != 0, ((new_prices - first)/first)*100, 0)
+
+def _step_loop(prices, targets, init_mask, hist_buf, head, avg_gain, avg_loss, noise, period, out_prices, out_chg, out_rsi):
+    """_step_numpy as one fused loop (compiled with Numba): no temporaries"""
+    oldest = (head + 1) % hist_buf.shape[1]
+    for i in range(prices.shape[0]):
+        curr = prices[i]
+        if init_mask[i]:
+            new_p = curr + (targets[i] - curr) * 0.1 + noise[i] * curr * 0.00015
+        else:
+            new_p = curr + noise[i] * 0.5
+        
+        delta = new_p - curr
+        gain = (avg_gain[i] * (period - 1) + max(delta, 0.0)) / period
+        loss = (avg_loss[i] * (period - 1) + max(-delta, 0.0)) / period
+        avg_gain[i] = gain
+        avg_loss[i] = loss
+        out_rsi[i] = 100 - (100/(1 + gain/loss)) if loss != 0 else 50
+        
+        prices[i] = new_p
+        hist_buf[i, head] = new_p
+        first = hist_buf[i, oldest]
+        out_chg[i] = ((new_p - first)/first)*100 if first != 0 else 0
+        out_prices[i] = new_p
+
+_step = njit(cache=True, fastmath=True, boundscheck=False)(_step_loop) if HAVE_NUMBA else _step_numpy
+
+def _last_bar(timestamps, closes):
+    """(timestamp, close) of the most recent bar with a close, or None"""
+    for ts, c in zip(reversed(timestamps or []), reversed(closes or [])):
+        if c is not None: return int(ts), float(c)
+    return None
+
+def _fetch_spark(batch):
+    """
+    Latest price for up to SPARK_BATCH symbols from Yahoo's spark endpoint, which
+    only returns closes + timestamps. Returns {symbol: (timestamp, price)}.
+    """
+    query = urllib.parse.urlencode({"symbols": ",".join(batch), "range": "1d", "interval": "1m", "indicators": "close"})
+    req = urllib.request.Request(f"{AppConfig.SPARK_URL}?{query}", headers={"User-Agent": "Mozilla/5.0"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        payload = json.load(resp)
+    
+    bars = {}
+    if "spark" in payload:
+        # {"spark": {"result": [{"symbol", "response": [{"timestamp": [...], "indicators": {"quote": [{"close": [...]}]}}]}]}}
+        for res in payload["spark"].get("result") or []:
+            for r in res.get("response") or []:
+                bars[res["symbol"]] = _last_bar(r.get("timestamp"), r["indicators"]["quote"][0]["close"])
+    else:
+        # {symbol: {"timestamp": [...], "close": [...]}}
+        for sym, r in payload.items():
+            bars[sym] = _last_bar(r.get("timestamp"), r.get("close"))
+    return {sym: bar for sym, bar in bars.items() if bar is not None}
+
+def _ticker_close(t):
+    """(timestamp, close) of one symbol's latest bar from its 1-day / 1-minute history"""
+    closes = yf.Ticker(t).history(period="1d", interval="1m")['Close'].dropna()
+    return int(closes.index[-1].timestamp()), float(closes.iloc[-1])
+
+def _fetch_history(batch):
+    """
+    Fallback when the spark endpoint fails: per-symbol yfinance histories, fetched in
+    parallel. A symbol that fails is just left out; the rest still arrive.
+    """
+    out = {}
+    with ThreadPoolExecutor(max_workers=AppConfig.HISTORY_WORKERS) as ex:
+        futures = {ex.submit(_ticker_close, t): t for t in batch}
+        for fut in as_completed(futures):
+            try: out[futures[fut]] = fut.result()
+            except Exception: pass
+    return out
+
+def fetch_latest(batch):
+    """{symbol: (timestamp, price)} of the latest bars for one batch: spark first, per-symbol histories as fallback"""
+    try:
+        return _fetch_spark(batch)
+    except Exception:
+        return _fetch_history(batch)
+
+@dataclass
+class Snapshot:
+    """
+    One tick for all tickers, row i = engine.tickers[i]. The engine double-buffers
+    two of these: a published snapshot isn't written again until the tick after next.
+    """
+    prices: np.ndarray
+    chg: np.ndarray
+    hist: np.ndarray
+    rsi: np.ndarray
+
 class TerminalEngine(QThread):
-    sig_update = pyqtSignal(dict)
+    sig_update = pyqtSignal(object) # Snapshot
     
     def __init__(self, watchlists):
         super().__init__()
-        self.tickers = list(set([t for cat in watchlists.values() for t in cat]))
+        # Deduplicated in watchlist order, so ticker indices are the same on every run
+        self.tickers = list(dict.fromkeys(t for cat in watchlists.values() for t in cat))
         self.running = True
-        self.lock = threading.Lock()
+        # Only guards the two hand-overs below (a buffer index and a fetch result),
+        # never the computation itself
+        self.swap_lock = threading.Lock()
+        
+        # Per-ticker state as parallel arrays (index = ticker_idx[t]), so a tick
+        # updates every ticker with a few array operations. Everything is float32:
+        # prices are shown with 2 decimals, and it halves the bytes moved per tick.
+        n = len(self.tickers)
+        self.ticker_idx = {t: i for i, t in enumerate(self.tickers)}
+        # One PCG64 generator for all engine randomness; per-tick noise is drawn in a single
+        # batched C call straight into a reused buffer
+        self.rng = np.random.Generator(np.random.PCG64())
+        self.noise = np.empty(n, dtype=np.float32)
+        self.prices_arr = np.full(n, 1000.0, dtype=np.float32)
+        self.target_arr = np.full(n, 1000.0, dtype=np.float32)
+        self.init_mask = np.zeros(n, dtype=np.bool_)
         
         # --- CRITICAL FIX 3: SEED DATA ---
         # We pre-fill the history with random noise so the chart isn't empty/flat on launch.
-        self.prices = {t: 1000.0 for t in self.tickers}
-        self.histories = {t: [1000.0 + random.uniform(-2, 2) for _ in range(60)] for t in self.tickers}
-        self.real_target = {t: 1000.0 for t in self.tickers}
-        self.initialized = {t: False for t in self.tickers}
-        
+        # Histories: one ring buffer row per ticker. All tickers tick together, so they
+        # share one write index; hist_buf[:, head] holds the newest price.
+        self.hist_buf = self.rng.uniform(998, 1002, (n, AppConfig.HISTORY_LEN)).astype(np.float32)
+        self.head = AppConfig.HISTORY_LEN - 1
+        
+        # RSI state (Wilder's smoothed average gain/loss), updated incrementally each tick
+        self.avg_gain = np.zeros(n, dtype=np.float32)
+        self.avg_loss = np.zeros(n, dtype=np.float32)
+        for t in self.tickers: self.seed_rsi(t)
+        
+        # Double-buffered output: each tick fills buf[1 - pub_idx], then flips pub_idx
+        L = AppConfig.HISTORY_LEN
+        f32 = np.float32
+        self.buf = [Snapshot(np.empty(n, f32), np.empty(n, f32), np.empty((n, L), f32), np.empty(n, f32)) for _ in range(2)]
+        self.pub_idx = 0
+        # Latest fetch result (NaN = no data), picked up by the engine on its next tick
+        self.target_arr_next = None
+        
+        # Latest bar per ticker {t: (timestamp, close)}: seeded from the previous run's
+        # cache (real prices on the first frame), then maintained by fetch_worker
+        self.latest = {}
+        self.load_latest()
+        
+        if HAVE_NUMBA:
+            # Compile (or load from cache) now, not on the first tick; dummy arrays leave the state alone
+            snap = self.buf[0]
+            _step(self.prices_arr.copy(), self.target_arr.copy(), self.init_mask.copy(), self.hist_buf.copy(), 0,
+                  self.avg_gain.copy(), self.avg_loss.copy(), np.zeros(n, dtype=np.float32), AppConfig.RSI_PERIOD, snap.prices, snap.chg, snap.rsi)
+    
+    def history(self, t):
+        """Oldest-to-newest copy of one ticker's history"""
+        return np.roll(self.hist_buf[self.ticker_idx[t]], -(self.head + 1))
+
+    def set_history(self, t, values):
+        """Overwrites one ticker's history with oldest-to-newest values"""
+        self.hist_buf[self.ticker_idx[t]] = np.roll(values, self.head + 1)
+
+    def seed_rsi(self, t):
+        """(Re)starts the RSI averages from the current history (one-time np.diff)"""
+        i = self.ticker_idx[t]
+        delta = np.diff(self.history(t))
+        self.avg_gain[i] = np.clip(delta, 0, None).mean()
+        self.avg_loss[i] = np.clip(-delta, 0, None).mean()
+
+    def apply_targets(self, targets):
+        """Takes a fetch result on the engine thread. A ticker's first real price snaps its graph to it."""
+        have = ~np.isnan(targets)
+        self.target_arr[have] = targets[have]
+        for i in np.flatnonzero(have & ~self.init_mask):
+            t, real = self.tickers[i], float(targets[i])
+            self.prices_arr[i] = real
+            self.set_history(t, np.linspace(real*0.99, real, AppConfig.HISTORY_LEN))
+            self.seed_rsi(t)
+            self.init_mask[i] = True
+        
+    def load_latest(self):
+        """Snaps tickers to the prices cached by the previous run (if any)"""
+        try:
+            with np.load(LATEST_CACHE) as z:
+                cached = zip(z['tickers'].tolist(), z['ts'].tolist(), z['close'].tolist())
+                targets = np.full(len(self.tickers), np.nan)
+                for t, ts, close in cached:
+                    if t in self.ticker_idx:
+                        self.latest[t] = (ts, close)
+                        targets[self.ticker_idx[t]] = close
+        except (OSError, KeyError, ValueError):
+            return # No (usable) cache: wait for the first fetch
+        self.apply_targets(targets)
+
+    def save_latest(self):
+        tickers = list(self.latest)
+        try:
+            tmp_path = LATEST_CACHE + ".tmp.npz"
+            np.savez(tmp_path,
+                     tickers=np.array(tickers, dtype=str),
+                     ts=np.array([self.latest[t][0] for t in tickers], dtype=np.int64),
+                     close=np.array([self.latest[t][1] for t in tickers], dtype=np.float64))
+            os.replace(tmp_path, LATEST_CACHE)
+        except OSError as e:
+            logging.warning(f"Could not cache latest prices: {e}")
+
     def fetch_worker(self):
-        """Background thread to download real data from Yahoo"""
-        while self.running:
-            try:
-                data = yf.download(" ".join(self.tickers), period="5d", interval="5m", progress=False, threads=True, auto_adjust=True)
-                with self.lock:
-                    for t in self.tickers:
-                        try:
-                            # Handle different dataframe shapes
-                            if len(self.tickers) > 1: s = data['Close'][t].dropna().values
-                            else: s = data['Close'].dropna().values
-                            
-                            if len(s) > 0:
-                                real = float(s[-1])
-                                self.real_target[t] = real
-                                
-                                # If this is the first real data point, snap the graph to it immediately
-                                if not self.initialized[t]:
-                                    self.prices[t] = real
-                                    self.histories[t] = list(np.linspace(real*0.99, real, 60))
-                                    self.initialized[t] = True
-                        except: pass
-            except: pass
-            time.sleep(10) # Update every 10 seconds
+        """Background thread to download real data from Yahoo (latest prices only, batches in parallel)"""
+        k = AppConfig.SPARK_BATCH
+        batches = [self.tickers[i:i+k] for i in range(0, len(self.tickers), k)]
+        with ThreadPoolExecutor(max_workers=AppConfig.FETCH_WORKERS) as pool:
+            while self.running:
+                targets = np.full(len(self.tickers), np.nan)
+                changed = False
+                for bars in pool.map(fetch_latest, batches):
+                    for t, (ts, real) in bars.items():
+                        # Same bar as last time (e.g. market closed): nothing new for this ticker
+                        if t not in self.ticker_idx or self.latest.get(t, (None,))[0] == ts: continue
+                        self.latest[t] = (ts, real)
+                        targets[self.ticker_idx[t]] = real
+                        changed = True
+                if changed:
+                    # Hand over by swapping one reference; the engine applies it on its next tick
+                    with self.swap_lock:
+                        self.target_arr_next = targets
+                    self.save_latest()
+                time.sleep(10) # Update every 10 seconds
 
     def run(self):
         t = threading.Thread(target=self.fetch_worker, daemon=True)
         t.start()
         
-        # High-Speed Loop for Animations
+        # High-Speed Loop for Animations (all tickers at once)
+        n = AppConfig.RSI_PERIOD
         while self.running:
-            updates = {}
-            with self.lock:
-                for t in self.tickers:
-                    curr = self.prices[t]
-                    tgt = self.real_target[t]
-                    
-                    # Smooth Animation Logic
-                    if self.initialized[t]:
-                        drift = (tgt - curr) * 0.1
-                        noise = random.normalvariate(0, curr * 0.00015)
-                        new_p = curr + drift + noise
-                    else:
-                        # While waiting for data, gently wiggle the line so it looks "alive"
-                        new_p = curr + random.normalvariate(0, 0.5)
-
-                    self.prices[t] = new_p
-                    self.histories[t].append(new_p)
-                    if len(self.histories[t]) > 60: self.histories[t].pop(0)
-                    
-                    hist_arr = np.array(self.histories[t])
-                    chg = ((new_p - hist_arr[0])/hist_arr[0])*100 if hist_arr[0] != 0 else 0
-                    
-                    # RSI Calculation (Simulated)
-                    delta = np.diff(hist_arr)
-                    up = delta[delta > 0].sum()
-                    down = -delta[delta < 0].sum()
-                    rs = up/down if down != 0 else 0
-                    rsi = 100 - (100/(1+rs)) if down != 0 else 50
-                    
-                    updates[t] = {
-                        'price': new_p,
-                        'change': chg,
-                        'history': hist_arr,
-                        'rsi': rsi
-                    }
-            self.sig_update.emit(updates)
+            with self.swap_lock:
+                targets, self.target_arr_next = self.target_arr_next, None
+            if targets is not None:
+                self.apply_targets(targets)
+            
+            # Advance the shared write index; the slot after it is now the oldest tick
+            self.head = (self.head + 1) % AppConfig.HISTORY_LEN
+            
+            # Fill the back buffer (the UI may still be reading the published one).
+            # Noise is drawn here: NumPy's PCG64 beats Numba's generator
+            snap = self.buf[1 - self.pub_idx]
+            _step(self.prices_arr, self.target_arr, self.init_mask, self.hist_buf, self.head,
+                  self.avg_gain, self.avg_loss, self.rng.standard_normal(dtype=np.float32, out=self.noise), n,
+                  snap.prices, snap.chg, snap.rsi)
+            
+            # Chronological histories: oldest slot first
+            h = self.head + 1
+            np.concatenate((self.hist_buf[:, h:], self.hist_buf[:, :h]), axis=1, out=snap.hist)
+            
+            with self.swap_lock:
+                self.pub_idx = 1 - self.pub_idx
+            self.sig_update.emit(snap)
             self.msleep(AppConfig.REFRESH_RATE_MS)
 
     def stop(self):
@@ -227,6 +486,87 @@ class TerminalEngine(QThread):
 # -----------------------------------------------------------------------------
 # 6. UI COMPONENTS (VISUALS)
 # -----------------------------------------------------------------------------
+def m4_bin(y, n_bins):
+    """
+    M4 decimation: keeps the first, min, max and last sample of each of n_bins bins,
+    in time order. At one bin per pixel column the line draws the same as the full data.
+    Returns (x indices, values).
+    """
+    n = len(y)
+    size = -(-n // n_bins) # ceil
+    n_bins = -(-n // size)
+    pad = n_bins * size - n
+    rows = np.concatenate((y, np.full(pad, y[-1]))).reshape(n_bins, size) if pad else y.reshape(n_bins, size)
+    
+    start = np.arange(n_bins) * size
+    end = np.minimum(start + size - 1, n - 1)
+    # The padding repeats the last sample, so clamp indices that land in it
+    imin = np.minimum(start + rows.argmin(axis=1), n - 1)
+    imax = np.minimum(start + rows.argmax(axis=1), n - 1)
+    idx = np.sort(np.stack((start, imin, imax, end), axis=1), axis=1).ravel()
+    return idx, y[idx]
+
+class LineSegments:
+    """
+    A sip.array of QLineF whose memory is also exposed as an (n, 4) float64 numpy
+    view [x1, y1, x2, y2]: segments are filled in place, with no per-point copies.
+    """
+    def __init__(self):
+        self.lines = None
+        self.mem = np.empty((0, 4))
+
+    def get(self, size):
+        if size != len(self.mem):
+            self.lines = sip.array(QLineF, size)
+            vp = sip.voidptr(self.lines, size * 4 * 8)
+            self.mem = np.frombuffer(vp, dtype=np.float64).reshape(size, 4) if size else np.empty((0, 4))
+        return self.lines, self.mem
+
+class SegmentsItem(pg.GraphicsObject):
+    """Static polyline drawn from a LineSegments buffer with one QPainter.drawLines call"""
+    def __init__(self, x, y, pen):
+        super().__init__()
+        self.pen = pen
+        self.segments = LineSegments()
+        self.lines, mem = self.segments.get(len(y) - 1)
+        mem[:, 0] = x[:-1]
+        mem[:, 1] = y[:-1]
+        mem[:, 2] = x[1:]
+        mem[:, 3] = y[1:]
+        self.rect = QRectF(float(x.min()), float(y.min()), float(x.max() - x.min()), float(y.max() - y.min()))
+
+    def viewTransformChanged(self):
+        self.prepareGeometryChange() # The pen padding below depends on the zoom
+
+    def boundingRect(self):
+        # Pad by the pen width (the pen is cosmetic, so convert pixels to data units):
+        # the device cache clips to this rect, and a flat line would have zero height
+        px, py = self.pixelVectors()
+        w = self.pen.widthF() or 1.0 # Width 0 still draws 1px
+        dx = 0.0 if px is None else px.length() * w
+        dy = 0.0 if py is None else py.length() * w
+        return self.rect.adjusted(-dx, -dy, dx, dy)
+
+    def paint(self, p, *args):
+        p.setPen(self.pen)
+        p.drawLines(self.lines)
+
+def cache_item(item):
+    """
+    Lets Qt reuse an item's last rasterization on unrelated repaints (pyqtgraph doesn't
+    set a cache mode). setData/setPath invalidate the cache when the data changes.
+    """
+    item.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+
+# Generator for the popup's simulated RSI trace (PCG64, not the legacy global RandomState)
+POPUP_RNG = np.random.default_rng()
+
+def rolling_mean(a, w):
+    """Simple moving average over windows of w (same as np.convolve(a, np.ones(w)/w, 'valid')), one prefix-sum pass"""
+    c = np.cumsum(a, dtype=np.float64)
+    c = np.concatenate(([0.0], c))
+    return (c[w:] - c[:-w]) / w
+
 class ChartPopup(QWidget):
     """Detailed Analysis Window"""
     def __init__(self, ticker, data, theme, parent=None):
@@ -266,12 +606,19 @@ class ChartPopup(QWidget):
         self.plot.showGrid(x=True, y=True, alpha=0.1)
         
         hist = data['history']
-        sma = np.convolve(hist, np.ones(5)/5, mode='valid')
+        sma = rolling_mean(hist, 5)
         col = theme.up if data['change'] >= 0 else theme.down
         
         self.plot.plot(hist, pen=pg.mkPen(col, width=2), name="Price")
-        if len(sma) > 0:
-            self.plot.plot(range(4, len(hist)), sma, pen=pg.mkPen('#FFA500', width=1, style=Qt.PenStyle.DashLine))
+        sma_pen = pg.mkPen('#FFA500', width=1, style=Qt.PenStyle.DashLine)
+        if len(sma) > 1 and HAVE_SIP_ARRAY:
+            # Static overlay: drawn straight from a QLineF buffer, no QPainterPath
+            sma_item = SegmentsItem(np.arange(4, len(hist), dtype=np.float64), sma, sma_pen)
+            self.plot.addItem(sma_item)
+            cache_item(sma_item) # Static after construction
+        elif len(sma) > 0:
+            sma_item = self.plot.plot(np.arange(4, len(hist)), sma, pen=sma_pen)
+            cache_item(sma_item.curve) # Static after construction
         fl.addWidget(self.plot, 2)
         
         rsi_lbl = QLabel(f"RSI Indicator: {data['rsi']:.1f}")
@@ -281,7 +628,7 @@ class ChartPopup(QWidget):
         self.rsi_plot = pg.PlotWidget()
         self.rsi_plot.setBackground('transparent')
         self.rsi_plot.setFixedHeight(100)
-        rsi_data = np.random.normal(data['rsi'], 2, 50)
+        rsi_data = POPUP_RNG.normal(data['rsi'], 2, 50)
         self.rsi_plot.plot(rsi_data, pen=pg.mkPen('#00E5FF', width=1))
         self.rsi_plot.addLine(y=70, pen=pg.mkPen('#FF4444', width=1))
         self.rsi_plot.addLine(y=30, pen=pg.mkPen('#00FF7F', width=1))
@@ -301,12 +648,11 @@ class ChartPopup(QWidget):
 
 class SmartTile(QWidget):
     clicked = pyqtSignal(str)
+    theme = THEMES["DARK"] # Shared by all tiles, swapped by TerminalWindow.toggle_theme
     
-    def __init__(self, ticker, theme):
+    def __init__(self, ticker):
         super().__init__()
         self.ticker = ticker
-        self.theme = theme
-        self.data = None
         self.loading = True
         
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
@@ -320,7 +666,8 @@ class SmartTile(QWidget):
         r1.addStretch()
         
         self.price_lbl = QLabel("Loading...")
-        self.price_lbl.setStyleSheet(f"color: {theme.fg}; font-weight: bold; font-size: 11pt;")
+        self.price_lbl.setObjectName("price")
+        self.price_lbl.setProperty("loading", "true")
         r1.addWidget(self.price_lbl)
         self.layout.addLayout(r1)
         
@@ -336,6 +683,21 @@ class SmartTile(QWidget):
         self.plot.setDownsampling(mode='peak')
         self.layout.addWidget(self.plot)
         
+        # Retained items: each update only pushes new data into them
+        self.x = np.arange(AppConfig.HISTORY_LEN)
+        self.y = np.zeros(AppConfig.HISTORY_LEN, dtype=np.float32)
+        self.floor_y = np.zeros(AppConfig.HISTORY_LEN)
+        self.trend = None
+        self.trend_theme = None
+        theme = self.theme
+        self.curve = self.plot.plot(pen=theme.pen_up)
+        self.floor = self.plot.plot(pen=None)
+        # Gradient Fill
+        self.fill = pg.FillBetweenItem(self.curve, self.floor, brush=theme.brush_up)
+        self.plot.addItem(self.fill)
+        cache_item(self.curve.curve) # The PlotCurveItem inside the PlotDataItem does the painting
+        cache_item(self.fill)
+        
         # Loading Animation (Skeleton)
         self.opacity = QGraphicsOpacityEffect(self)
         self.setGraphicsEffect(self.opacity)
@@ -348,41 +710,44 @@ class SmartTile(QWidget):
         self.anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
         self.anim.start()
 
-    def update_style(self, theme):
-        self.theme = theme
-        self.price_lbl.setStyleSheet(f"color: {theme.fg}; font-weight: bold; font-size: 11pt;")
-
-    def update_data(self, d):
-        self.data = d
+    def update_data_fast(self, price, change, history, rsi):
         if self.loading:
             self.anim.stop()
             self.opacity.setOpacity(1)
             self.loading = False
+            # From now on the price color comes from the palette (see below)
+            self.price_lbl.setProperty("loading", "false")
+            self.style().unpolish(self.price_lbl)
+            self.style().polish(self.price_lbl)
             
-        col = self.theme.up if d['change'] >= 0 else self.theme.down
-        
-        self.plot.clear()
-        self.plot.plot(d['history'], pen=pg.mkPen(col, width=2))
-        
-        # Gradient Fill
-        fill = pg.FillBetweenItem(
-            curve1=self.plot.plot(d['history'], pen=None),
-            curve2=self.plot.plot([min(d['history'])]*len(d['history']), pen=None),
-            brush=pg.mkBrush(QColor(col + "20"))
-        )
-        self.plot.addItem(fill)
-
-        self.price_lbl.setText(f"{d['price']:.2f}")
-        self.price_lbl.setStyleSheet(f"color: {col}; font-weight: bold;")
-        
-        self.setStyleSheet(f"""
-            SmartTile {{
-                background: {self.theme.panel}aa;
-                border: 1px solid {self.theme.border};
-                border-radius: 6px;
-            }}
-            SmartTile:hover {{ border: 1px solid {col}; background: {self.theme.panel}; }}
-        """)
+        up = change >= 0
+        trend = "up" if up else "down"
+        t = self.theme
+        # Pens/brushes/colors only change when the direction flips or the theme changed
+        if trend != self.trend or t is not self.trend_theme:
+            self.trend, self.trend_theme = trend, t
+            self.curve.setPen(t.pen_up if up else t.pen_down)
+            self.fill.setBrush(t.brush_up if up else t.brush_down)
+            pal = self.price_lbl.palette()
+            pal.setColor(QPalette.ColorRole.WindowText, t.color_up if up else t.color_down)
+            self.price_lbl.setPalette(pal)
+            # Hover border: switch the matching app QSS rule by property, re-polishing only on a flip
+            self.setProperty("trend", trend)
+            self.style().unpolish(self)
+            self.style().polish(self)
+        
+        # history is a view into an engine snapshot buffer that gets reused, and
+        # pyqtgraph keeps a reference to what it's given: plot a tile-owned copy
+        np.copyto(self.y, history)
+        self.floor_y.fill(self.y.min())
+        n_bins = max(1, self.width() // 4)
+        if len(self.y) > 4 * n_bins:
+            self.curve.setData(*m4_bin(self.y, n_bins)) # More samples than pixels: decimate
+        else:
+            self.curve.setData(self.x, self.y)
+        self.floor.setData(self.x, self.floor_y)
+
+        self.price_lbl.setText(f"{price:.2f}")
 
     def mousePressEvent(self, e):
         self.clicked.emit(self.ticker)
@@ -408,6 +773,20 @@ class TerminalWindow(QMainWindow):
         # ...Then start Engine
         self.engine = TerminalEngine(AppConfig.WATCHLISTS)
         self.engine.sig_update.connect(self.broadcast_data)
+        # Per tab: (snapshot row, tile) pairs in a fixed order
+        self.slots_by_tab = {
+            page: [(self.engine.ticker_idx[tile.ticker], tile) for tile in tiles]
+            for page, tiles in self.tiles_by_tab.items()
+        }
+        
+        # Engine ticks are only stashed; a UI-rate timer pushes the latest one to the visible tab
+        self.last_snapshot = None
+        self.snap_seq = 0
+        self.flushed = (None, 0) # (tab, snap_seq) last pushed to the tiles
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self._flush_snapshot)
+        self.flush_timer.start(1000 // AppConfig.UI_FPS)
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         self.engine.start()
         
         geo = self.settings.value("geometry")
@@ -423,18 +802,21 @@ class TerminalWindow(QMainWindow):
         
         # 1. Create Title Bar Widget
         self.title_bar = QFrame()
+        self.title_bar.setObjectName("title_bar")
         self.title_bar.setFixedHeight(45)
         
         # 2. Add Layout & Widgets
         hb = QHBoxLayout(self.title_bar)
         
         self.lbl_title = QLabel(f"⚡ {AppConfig.APP_NAME}")
+        self.lbl_title.setObjectName("title")
         self.lbl_title.setStyleSheet("font-weight: bold; font-family: Segoe UI;")
         hb.addWidget(self.lbl_title)
         
         hb.addStretch()
         
         self.btn_theme = QPushButton("🌗")
+        self.btn_theme.setObjectName("theme_btn")
         self.btn_theme.setFixedSize(30, 30)
         self.btn_theme.clicked.connect(self.toggle_theme)
         hb.addWidget(self.btn_theme)
@@ -445,17 +827,19 @@ class TerminalWindow(QMainWindow):
         btn_close.setStyleSheet("border:none; font-weight:bold;")
         hb.addWidget(btn_close)
         
-        # 3. Apply Style (Now safe because widgets exist)
-        self.style_title_bar()
+        # 3. Style: one app-level sheet, the theme is picked by the "appTheme" property
+        self.setProperty("appTheme", self.current_theme.name.lower())
+        SmartTile.theme = self.current_theme
+        QApplication.instance().setStyleSheet(APP_QSS)
         self.main_layout.addWidget(self.title_bar)
         
         # 4. Tabs
         self.tabs = QTabWidget()
-        self.style_tabs()
         self.main_layout.addWidget(self.tabs)
         
         self.grids = {} 
         self.all_tiles = {}
+        self.tiles_by_tab = {}
         
         for name, tickers in AppConfig.WATCHLISTS.items():
             page = QWidget()
@@ -465,10 +849,11 @@ class TerminalWindow(QMainWindow):
             
             row, col = 0, 0
             for t in tickers:
-                tile = SmartTile(t, self.current_theme)
+                tile = SmartTile(t)
                 tile.clicked.connect(self.open_chart)
                 layout.addWidget(tile, row, col)
                 self.all_tiles[t] = tile 
+                self.tiles_by_tab.setdefault(page, []).append(tile)
                 
                 col += 1
                 if col >= 4:
@@ -478,24 +863,6 @@ class TerminalWindow(QMainWindow):
             layout.setRowStretch(row+1, 1)
             self.tabs.addTab(page, name)
 
-    def style_title_bar(self):
-        t = self.current_theme
-        self.title_bar.setStyleSheet(f"background: {t.bg}dd; border-bottom: 1px solid {t.border};")
-        self.lbl_title.setStyleSheet(f"color: {t.up}; border: none;")
-        self.btn_theme.setStyleSheet(f"color: {t.fg}; background: transparent; border: none;")
-
-    def style_tabs(self):
-        t = self.current_theme
-        self.tabs.setStyleSheet(f"""
-            QTabWidget::pane {{ border: none; background: transparent; }}
-            QTabBar::tab {{ 
-                background: {t.panel}; color: {t.fg}; 
-                padding: 10px 20px; border-top-left-radius: 6px; border-top-right-radius: 6px;
-                margin-right: 2px;
-            }}
-            QTabBar::tab:selected {{ background: {t.up}; color: black; font-weight: bold; }}
-        """)
-
     def toggle_theme(self):
         if self.current_theme.name == "Dark":
             self.current_theme = THEMES["LIGHT"]
@@ -503,20 +870,40 @@ class TerminalWindow(QMainWindow):
             self.current_theme = THEMES["DARK"]
             
         self.fx.apply(self.winId(), self.current_theme.glass)
-        self.style_title_bar()
-        self.style_tabs()
-        
-        for t in self.all_tiles.values():
-            t.update_style(self.current_theme)
-
-    def broadcast_data(self, data):
-        for t, packet in data.items():
-            if t in self.all_tiles:
-                self.all_tiles[t].update_data(packet)
+        # Flip the property and re-apply the app sheet: a single, central re-polish
+        self.setProperty("appTheme", self.current_theme.name.lower())
+        app = QApplication.instance()
+        app.setStyleSheet(app.styleSheet())
+        
+        # Tiles pick the new pens/colors up on their next update; re-push the current snapshot
+        SmartTile.theme = self.current_theme
+        self.flushed = (None, 0)
+
+    def broadcast_data(self, snap):
+        self.last_snapshot = snap
+        self.snap_seq += 1
+
+    def _flush_snapshot(self):
+        """Pushes the latest snapshot to the tiles of the visible tab (once per snapshot)"""
+        snap, page = self.last_snapshot, self.tabs.currentWidget()
+        if snap is None or self.flushed == (page, self.snap_seq): return
+        self.flushed = (page, self.snap_seq)
+        prices, chg, hist, rsi = snap.prices, snap.chg, snap.hist, snap.rsi
+        for i, tile in self.slots_by_tab.get(page, ()):
+            tile.update_data_fast(float(prices[i]), float(chg[i]), hist[i], float(rsi[i]))
+
+    def _on_tab_changed(self, index):
+        # Tiles on hidden tabs weren't updated: catch the new tab up right away
+        self._flush_snapshot()
 
     def open_chart(self, ticker):
-        if ticker in self.all_tiles and self.all_tiles[ticker].data:
-            self.popup = ChartPopup(ticker, self.all_tiles[ticker].data, self.current_theme, self)
+        snap = self.last_snapshot
+        if snap is not None and ticker in self.engine.ticker_idx:
+            # Read from the latest snapshot (hidden tiles may be stale); the history is
+            # a view into an engine buffer, so the popup gets its own copy
+            i = self.engine.ticker_idx[ticker]
+            data = {'price': float(snap.prices[i]), 'change': float(snap.chg[i]), 'history': snap.hist[i].copy(), 'rsi': float(snap.rsi[i])}
+            self.popup = ChartPopup(ticker, data, self.current_theme, self)
             self.popup.show()
 
     def mousePressEvent(self, e):